@@ -0,0 +1,80 @@
+# async_cart.py
+import asyncio
+import inspect
+
+from shopping_cart import Cart, _normalize_coupon
+
+class AsyncCouponService:
+    """
+    Adapta um serviço de cupons para asyncio, mantendo o contrato de
+    CouponService.validate_coupon.
+
+    Se o validate_coupon do serviço for uma corrotina, é aguardado diretamente;
+    caso contrário roda em uma thread (asyncio.to_thread) para não bloquear o
+    event loop. Toda consulta respeita um timeout (asyncio.TimeoutError ao estourar).
+    """
+    def __init__(self, coupon_service, timeout: float | None = 1.0):
+        self.coupon_service = coupon_service
+        self.timeout = timeout
+
+    async def validate_coupon(self, coupon_code: str, timeout: float | None = None) -> dict | None:
+        validate = self.coupon_service.validate_coupon
+        if inspect.iscoroutinefunction(validate):
+            pending = validate(coupon_code)
+        else:
+            pending = asyncio.to_thread(validate, coupon_code)
+        return await asyncio.wait_for(pending, self.timeout if timeout is None else timeout)
+
+    async def validate_coupons(self, coupon_codes, timeout: float | None = None) -> dict[str, dict | None]:
+        """Valida vários códigos concorrentemente. Retorna {código: dados do cupom ou None}."""
+        coupon_codes = list(dict.fromkeys(coupon_codes)) # Sem consultas duplicadas
+        results = await asyncio.gather(
+            *(self.validate_coupon(code, timeout) for code in coupon_codes)
+        )
+        return dict(zip(coupon_codes, results))
+
+
+class AsyncCart(Cart):
+    """
+    Cart para servidores asyncio: apply_coupon é uma corrotina.
+
+    Itens, subtotal e cálculo do desconto são os do Cart; só a consulta ao serviço
+    de cupons muda. Um coupon_service síncrono é envolvido em AsyncCouponService.
+    Se a consulta falhar (ex.: timeout), a exceção é propagada e o cupom já
+    aplicado permanece.
+    """
+    def __init__(self, coupon_service=None, timeout: float | None = 1.0, promotion_engine=None):
+        if coupon_service is not None and not isinstance(coupon_service, AsyncCouponService):
+            coupon_service = AsyncCouponService(coupon_service, timeout=timeout)
+        super().__init__(coupon_service=coupon_service, promotion_engine=promotion_engine)
+
+    async def apply_coupon(self, coupon_code: str) -> bool:
+        """Versão assíncrona de Cart.apply_coupon."""
+        if self._activate_promotion_code(coupon_code):
+            return True
+        if not self.coupon_service:
+            return False
+
+        coupon_data = await self.coupon_service.validate_coupon(coupon_code)
+        return self._set_coupon(coupon_data)
+
+    async def apply_best_coupon(self, coupon_codes) -> str | None:
+        """
+        Valida os códigos concorrentemente e aplica o que resultar no menor total.
+        Retorna o código aplicado, ou None se nenhum for válido (o cupom atual é removido).
+        """
+        if not self.coupon_service:
+            return None
+
+        candidates = await self.coupon_service.validate_coupons(coupon_codes)
+        best_code, best_total = None, None
+        for code, coupon_data in candidates.items():
+            coupon = _normalize_coupon(coupon_data)
+            if coupon is None:
+                continue
+            total = self._total_with_coupon(coupon) # Simula sem alterar o carrinho
+            if best_total is None or total < best_total:
+                best_code, best_total = code, total
+
+        self._set_coupon(candidates[best_code] if best_code is not None else None)
+        return best_code
@@ -0,0 +1,171 @@
+# batch_pricing.py
+"""
+Precificação em lote de muitos carrinhos, em centavos inteiros.
+
+Reproduz exatamente Cart.get_total(): total por linha com ROUND_HALF_UP, subtotal
+somado por carrinho, cupom percentual limitado a 0-100% e cupom fixo com piso em
+zero. Usa NumPy (int64) quando disponível e cai para Python puro caso contrário,
+ou quando os valores não cabem com folga em int64.
+
+Entrada colunar (uma posição por linha de carrinho):
+    cart_ids     -> índice do carrinho (0 .. len(coupons) - 1)
+    quantities   -> quantidade da linha
+    price_units  -> preço unitário em unidades inteiras
+    price_scales -> casas decimais do preço (preço = unidades / 10**escala)
+    coupons      -> um cupom por carrinho, no formato de Cart._applied_coupon, ou None
+"""
+from decimal import Decimal
+
+from item import _line_total_cents, _units_to_decimal
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; o caminho em Python puro dá o mesmo resultado
+    np = None
+
+COUPON_NONE = 0
+COUPON_PERCENTAGE = 1
+COUPON_FIXED = 2
+
+_COUPON_KINDS = {"percentage": COUPON_PERCENTAGE, "fixed": COUPON_FIXED}
+_INT64_SAFE = 2 ** 62  # Margem para os produtos intermediários não estourarem int64
+
+
+class BatchPricingResult:
+    """Resultados em centavos: por linha (line_totals) e por carrinho (demais campos)."""
+
+    def __init__(self, line_totals, subtotals, discounts, totals):
+        self.line_totals = line_totals
+        self.subtotals = subtotals
+        self.discounts = discounts
+        self.totals = totals
+
+    def totals_as_decimal(self) -> list[Decimal]:
+        """Totais finais como Decimal, iguais aos de Cart.get_total()."""
+        return [_units_to_decimal(int(cents), 2) for cents in self.totals]
+
+
+def _coupon_parts(coupon) -> tuple[int, int, int]:
+    """Converte um cupom em (tipo, numerador, denominador) com valor = numerador / denominador."""
+    if not coupon:
+        return COUPON_NONE, 0, 1
+    kind = _COUPON_KINDS.get(coupon.get("type"), COUPON_NONE)
+    if kind == COUPON_NONE:
+        return COUPON_NONE, 0, 1
+    value = Decimal(str(coupon.get("value", 0)))
+    scale = max(-value.as_tuple().exponent, 0)
+    return kind, int(value.scaleb(scale)), 10 ** scale
+
+
+def _round_half_up(numerator: int, denominator: int) -> int:
+    """Divide arredondando com ROUND_HALF_UP (numerador não negativo)."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def _discounted_total_cents(subtotal: int, kind: int, numerator: int, denominator: int) -> int:
+    """Total final em centavos de um carrinho, com as mesmas regras de Cart.get_total()."""
+    if kind == COUPON_PERCENTAGE:
+        percent = min(max(numerator, 0), 100 * denominator)
+        return _round_half_up(subtotal * (100 * denominator - percent), 100 * denominator)
+    if kind == COUPON_FIXED:
+        remaining = subtotal * denominator - 100 * numerator
+        return _round_half_up(remaining, denominator) if remaining > 0 else 0
+    return subtotal
+
+
+def _price_python(cart_ids, quantities, price_units, price_scales, coupon_parts):
+    line_totals = [
+        _line_total_cents(quantity, units, scale)
+        for quantity, units, scale in zip(quantities, price_units, price_scales)
+    ]
+    subtotals = [0] * len(coupon_parts)
+    for cart_id, cents in zip(cart_ids, line_totals):
+        subtotals[cart_id] += cents
+    totals = [
+        _discounted_total_cents(subtotal, *parts)
+        for subtotal, parts in zip(subtotals, coupon_parts)
+    ]
+    discounts = [subtotal - total for subtotal, total in zip(subtotals, totals)]
+    return BatchPricingResult(line_totals, subtotals, discounts, totals)
+
+
+def _price_numpy(cart_ids, quantities, units, scales, coupon_parts):
+    multiplier = 10 ** np.clip(2 - scales, 0, None)
+    divisor = 10 ** np.clip(scales - 2, 0, None)
+    line_totals = (quantities * units * multiplier + divisor // 2) // divisor
+
+    subtotals = np.zeros(len(coupon_parts), dtype=np.int64)
+    np.add.at(subtotals, cart_ids, line_totals)
+
+    parts = np.asarray(coupon_parts, dtype=np.int64).reshape(-1, 3)
+    kinds, numerators, denominators = parts[:, 0], parts[:, 1], parts[:, 2]
+
+    percent_den = 100 * denominators
+    percent = np.clip(numerators, 0, percent_den)
+    percent_num = subtotals * (percent_den - percent)
+    percent_totals = (2 * percent_num + percent_den) // (2 * percent_den)
+
+    remaining = subtotals * denominators - 100 * numerators
+    fixed_totals = np.where(remaining > 0, (2 * remaining + denominators) // (2 * denominators), 0)
+
+    totals = np.where(
+        kinds == COUPON_PERCENTAGE,
+        percent_totals,
+        np.where(kinds == COUPON_FIXED, fixed_totals, subtotals),
+    )
+    return BatchPricingResult(line_totals, subtotals, subtotals - totals, totals)
+
+
+def _fits_int64(lines_per_cart, max_quantity, max_units, max_scale, coupon_parts) -> bool:
+    """Estimativa conservadora de que nenhum produto intermediário estoura int64."""
+    line_bound = max_quantity * max_units * 100 + 10 ** max_scale
+    subtotal_bound = line_bound * lines_per_cart
+    coupon_bound = max((abs(n) + 100 * d for _, n, d in coupon_parts), default=1) * 2
+    return line_bound < _INT64_SAFE and subtotal_bound * coupon_bound < _INT64_SAFE
+
+
+def price_columns(cart_ids, quantities, price_units, price_scales, coupons, use_numpy=None):
+    """
+    Precifica linhas em formato colunar. Retorna um BatchPricingResult.
+
+    As colunas podem ser listas ou arrays NumPy. use_numpy=None escolhe NumPy
+    automaticamente quando disponível; False força o caminho em Python puro.
+    """
+    coupon_parts = [_coupon_parts(coupon) for coupon in coupons]
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is None:
+        raise RuntimeError("NumPy não está instalado.")
+
+    if use_numpy:
+        # Valores Python muito grandes viram dtype=object e caem no caminho em Python puro
+        columns = [np.asarray(column) for column in (cart_ids, quantities, price_units, price_scales)]
+        if all(column.dtype.kind in "iu" for column in columns):
+            columns = [column.astype(np.int64, copy=False) for column in columns]
+            ids, q, u, sc = columns
+            if len(q):
+                bounds = (int(np.bincount(ids).max()), int(q.max()), int(u.max()), int(sc.max()))
+            else:
+                bounds = (0, 0, 0, 0)
+            if _fits_int64(*bounds, coupon_parts):
+                return _price_numpy(*columns, coupon_parts)
+        cart_ids, quantities, price_units, price_scales = (column.tolist() for column in columns)
+    return _price_python(cart_ids, quantities, price_units, price_scales, coupon_parts)
+
+
+def cart_columns(carts) -> tuple[list, list, list, list, list]:
+    """Extrai as colunas (cart_ids, quantities, price_units, price_scales, coupons) de carrinhos."""
+    cart_ids, quantities, price_units, price_scales, coupons = [], [], [], [], []
+    for cart_id, cart in enumerate(carts):
+        for item_obj in cart._items.values():
+            cart_ids.append(cart_id)
+            quantities.append(item_obj._quantity)
+            price_units.append(item_obj._price_units)
+            price_scales.append(item_obj._price_scale)
+        coupons.append(cart._applied_coupon)
+    return cart_ids, quantities, price_units, price_scales, coupons
+
+
+def price_carts(carts, use_numpy=None) -> BatchPricingResult:
+    """Precifica vários objetos Cart de uma vez."""
+    return price_columns(*cart_columns(carts), use_numpy=use_numpy)
@@ -0,0 +1,909 @@
+# benchmarks.py
+"""
+Benchmarks dos caminhos quentes do carrinho.
+
+Uso:
+    python benchmarks.py                          # suíte de regressão (caminhos quentes)
+    python benchmarks.py --all                    # todos os benchmarks, inclusive os longos
+    python benchmarks.py get_total promotions     # apenas os benchmarks informados
+    python benchmarks.py --sizes 1,100,10000 --output atual.json
+    python benchmarks.py --baseline base.json --threshold 0.15
+
+Cada benchmark devolve um dicionário de métricas. Métricas terminadas em
+"_per_second" são melhores quando maiores; as demais (segundos, bytes) quando
+menores. Com --baseline, as métricas são comparadas com um resultado anterior
+(gerado por --output) e o processo sai com código 1 se alguma piorar além do
+limite (--threshold, fração relativa).
+"""
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from decimal import Decimal
+
+import batch_pricing
+from async_cart import AsyncCart
+from cart_service import ShardedCartService
+from cart_store import CartRepository, SQLiteCartStore
+from concurrent_cart import ConcurrentCart
+from coupon_cache import CachedCouponService
+from coupon_service import CouponService, LatencyCouponService
+from instrumentation import Instrumentation, instrument_cart, uninstrument_cart
+from item import Item, _price_to_units
+from price_catalog import PriceTable, write_price_table
+from order_analytics import analyze_json_lines
+from promotions import BuyXGetY, ItemPercentOff, PromotionEngine, SpendThreshold
+from shopping_cart import Cart
+
+BENCHMARKS = {}
+
+
+SUITE = []  # Benchmarks rodados por padrão (rápidos, usados na detecção de regressões)
+DEFAULT_SIZES = (1, 100, 10_000, 100_000)
+
+
+def benchmark(name: str, suite: bool = False):
+    """Registra uma função de benchmark sob o nome informado."""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        if suite:
+            SUITE.append(name)
+        return func
+    return decorator
+
+
+def _time_per_call(func, repeat: int) -> float:
+    """Retorna o tempo médio (em segundos) de `repeat` chamadas a `func`."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def _best_time_per_call(func, repeat: int, rounds: int = 3) -> float:
+    """Menor tempo médio entre `rounds` medições, menos sensível a ruído."""
+    return min(_time_per_call(func, repeat) for _ in range(rounds))
+
+
+def _repeat_for(size: int, budget: int = 20_000) -> int:
+    """Quantidade de repetições para operações O(n) em um carrinho de `size` linhas."""
+    return max(1, budget // max(size, 1))
+
+
+def _build_cart(lines: int) -> Cart:
+    cart = Cart()
+    for i in range(lines):
+        cart.add_item(f"Item {i}", (i % 5) + 1, f"{(i % 997) + 0.99:.2f}")
+    return cart
+
+
+@benchmark("get_total", suite=True)
+def bench_get_total(sizes=DEFAULT_SIZES, repeat=10_000):
+    """Mostra que a leitura do total é O(1), independente do tamanho do carrinho."""
+    results = {}
+    for size in sizes:
+        cart = _build_cart(size)
+        cached = _time_per_call(cart.get_total, repeat)
+
+        def edit_and_read():
+            cart.add_item("Item 0", 1, "0.99")
+            cart.get_total()
+        after_edit = _time_per_call(edit_and_read, repeat)
+
+        results[size] = {"cached": cached, "after_edit": after_edit}
+        print(f"get_total  linhas={size:>7}  cache {cached * 1e6:8.3f} µs"
+              f"  após edição {after_edit * 1e6:8.3f} µs")
+    return results
+
+
+@benchmark("hot_paths", suite=True)
+def bench_hot_paths(sizes=DEFAULT_SIZES, new_lines=1_000):
+    """Latência de add_item, remove_item, get_total, list_items e apply_coupon por tamanho de carrinho."""
+    results = {}
+    for size in sizes:
+        cart = _build_cart(size)
+        cart.coupon_service = CouponService()
+        names = [f"Novo {i}" for i in range(new_lines)]
+
+        def add_new():
+            for name in names:
+                cart.add_item(name, 2, "3.49")
+
+        def remove_new():
+            for name in names:
+                cart.remove_item(name)
+
+        def edit_and_total():
+            cart.add_item("Item 0", 1, "0.99")
+            return cart.get_total()
+
+        codes = itertools.cycle(["SAVE10", "5OFF"])
+        add_seconds = remove_seconds = 0.0
+        for _ in range(3):
+            add_seconds += _time_per_call(add_new, 1) / new_lines
+            remove_seconds += _time_per_call(remove_new, 1) / new_lines
+        results[size] = {
+            "add_item_seconds": add_seconds / 3,
+            "remove_item_seconds": remove_seconds / 3,
+            "update_and_get_total_seconds": _best_time_per_call(edit_and_total, 2_000),
+            "list_items_seconds": _best_time_per_call(cart.list_items, _repeat_for(size)),
+            "apply_coupon_seconds": _best_time_per_call(lambda: cart.apply_coupon(next(codes)), 2_000),
+        }
+        print(f"hot_paths  linhas={size:>7}  "
+              + "  ".join(f"{key[:-8]} {value * 1e6:9.2f} µs" for key, value in results[size].items()))
+    return results
+
+
+@benchmark("mixed_workload", suite=True)
+def bench_mixed_workload(sizes=DEFAULT_SIZES, operations=20_000, seed=1234):
+    """Mistura de leituras e mutações (60% get_total, 35% edições, 5% listagem em carrinhos pequenos)."""
+    results = {}
+    for size in sizes:
+        rng = random.Random(seed)
+        cart = _build_cart(size)
+        names = [f"Item {i}" for i in range(max(size, 1))]
+        ops = []
+        for _ in range(operations):
+            roll = rng.random()
+            name = rng.choice(names)
+            if roll < 0.60:
+                ops.append((cart.get_total, ()))
+            elif roll < 0.80:
+                ops.append((cart.add_item, (name, 1, "1.99")))
+            elif roll < 0.95:
+                ops.append((cart.remove_item, (name, 1)))
+            elif size <= 1_000:
+                ops.append((cart.list_items, ()))
+            else:
+                ops.append((cart.get_total, ()))
+
+        started = time.perf_counter()
+        for func, func_args in ops:
+            func(*func_args)
+        results[size] = {"ops_per_second": operations / (time.perf_counter() - started)}
+        print(f"mixed_workload  linhas={size:>7}  {results[size]['ops_per_second']:10.0f} ops/s")
+    return results
+
+
+@benchmark("coupon_workload", suite=True)
+def bench_coupon_workload(sizes=DEFAULT_SIZES, repeat=5_000):
+    """Troca de cupons seguida de get_total(), com o serviço direto e com cache."""
+    results = {}
+    for size in sizes:
+        results[size] = {}
+        for label, service in (("direct", CouponService()), ("cached", CachedCouponService(CouponService()))):
+            cart = _build_cart(size)
+            cart.coupon_service = service
+            codes = itertools.cycle(["SAVE10", "5OFF", "INVALIDO", "SAVE10", "DESCONHECIDO"])
+
+            def apply_and_total():
+                cart.apply_coupon(next(codes))
+                return cart.get_total()
+
+            results[size][f"{label}_seconds"] = _best_time_per_call(apply_and_total, repeat)
+        print(f"coupon_workload  linhas={size:>7}  direto {results[size]['direct_seconds'] * 1e6:8.2f} µs"
+              f"  cache {results[size]['cached_seconds'] * 1e6:8.2f} µs")
+    return results
+
+
+@benchmark("cart_memory", suite=True)
+def bench_cart_memory(sizes=DEFAULT_SIZES):
+    """Memória retida por carrinho (tracemalloc), por quantidade de linhas."""
+    results = {}
+    for size in sizes:
+        carts = _repeat_for(size, budget=100_000)
+        lines = [(f"Item {i}", (i % 5) + 1, f"{(i % 997) + 0.99:.2f}") for i in range(size)]
+        tracemalloc.start()
+        try:
+            kept = []
+            for _ in range(carts):
+                cart = Cart()
+                cart.add_items(lines)
+                kept.append(cart)
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del kept
+        results[size] = {"bytes_per_cart": current / carts}
+        print(f"cart_memory  linhas={size:>7}  {current / carts:12.0f} bytes/carrinho")
+    return results
+
+
+@benchmark("add_items")
+def bench_add_items(lines=10_000, repeat=5):
+    """Compara add_items em lote com um laço de add_item para um lote de `lines` linhas."""
+    batch = [(f"Item {i}", (i % 5) + 1, f"{(i % 997) + 0.99:.2f}") for i in range(lines)]
+
+    def loop():
+        cart = Cart()
+        for name, quantity, unit_price in batch:
+            cart.add_item(name, quantity, unit_price)
+
+    def bulk():
+        Cart().add_items(batch)
+
+    looped = _time_per_call(loop, repeat)
+    bulked = _time_per_call(bulk, repeat)
+    print(f"add_items  linhas={lines}  laço {looped * 1e3:8.2f} ms"
+          f"  lote {bulked * 1e3:8.2f} ms  ({looped / bulked:.1f}x)")
+    return {"loop": looped, "bulk": bulked}
+
+
+@benchmark("batch_pricing")
+def bench_batch_pricing(carts=20_000, lines_per_cart=20):
+    """Repreço noturno: reconstruir cada carrinho e chamar get_total() vs. precificação em lote."""
+    count = carts * lines_per_cart
+    cart_ids = [i // lines_per_cart for i in range(count)]
+    quantities = [(i % 5) + 1 for i in range(count)]
+    price_units = [(i % 99_700) + 99 for i in range(count)]
+    price_scales = [2] * count
+    coupons = [{"type": "percentage", "value": Decimal("10")} if i % 3 else None for i in range(carts)]
+
+    def per_cart():
+        for cart_id in range(carts):
+            cart = Cart()
+            start = cart_id * lines_per_cart
+            cart.add_items(
+                (f"Item {i}", quantities[i], Decimal(price_units[i]).scaleb(-2))
+                for i in range(start, start + lines_per_cart)
+            )
+            cart._applied_coupon = coupons[cart_id]
+            cart.get_total()
+
+    columns = (cart_ids, quantities, price_units, price_scales, coupons)
+    results = {"per_cart": _time_per_call(per_cart, 1)}
+    results["python"] = _time_per_call(lambda: batch_pricing.price_columns(*columns, use_numpy=False), 1)
+    if batch_pricing.np is not None:
+        arrays = [batch_pricing.np.asarray(column) for column in columns[:4]] + [coupons]
+        results["numpy"] = _time_per_call(lambda: batch_pricing.price_columns(*arrays, use_numpy=True), 1)
+    print(f"batch_pricing  carrinhos={carts} linhas={count}  "
+          + "  ".join(f"{name} {seconds * 1e3:8.1f} ms" for name, seconds in results.items()))
+    return results
+
+
+@benchmark("coupon_cache")
+def bench_coupon_cache(lookups=2_000, latency=0.001):
+    """apply_coupon contra um serviço com latência, com e sem o cache na frente."""
+    results = {}
+    for label, service in (("direto", LatencyCouponService(latency)),
+                           ("cache", CachedCouponService(LatencyCouponService(latency)))):
+        cart = Cart(coupon_service=service)
+        cart.add_item("Produto", 1, "100.00")
+        codes = itertools.cycle(["SAVE10", "5OFF", "SAVE10", "DESCONHECIDO"])
+        results[label] = _time_per_call(lambda: cart.apply_coupon(next(codes)), lookups)
+    stats = service.stats()
+    print(f"coupon_cache  latência={latency * 1e3:.1f} ms  direto {results['direto'] * 1e6:9.1f} µs"
+          f"  cache {results['cache'] * 1e6:9.1f} µs  (hits={stats['hits']} misses={stats['misses']})")
+    return results
+
+
+class _AsyncLatencyCouponService(LatencyCouponService):
+    """Backend de cupons assíncrono com latência artificial."""
+
+    async def validate_coupon(self, coupon_code):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self.valid_coupons.get(coupon_code)
+
+
+@benchmark("async_load")
+def bench_async_load(carts=5_000, latency=0.01):
+    """Muitos AsyncCart aplicando cupons ao mesmo tempo no mesmo event loop."""
+    async def run(service):
+        async def checkout(i):
+            cart = AsyncCart(coupon_service=service, timeout=None)
+            cart.add_item("Produto", (i % 3) + 1, "19.90")
+            await cart.apply_coupon("SAVE10" if i % 2 else "5OFF")
+            return cart.get_total()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(checkout(i) for i in range(carts)))
+        return time.perf_counter() - started
+
+    results = {}
+    for label, service in (("async", _AsyncLatencyCouponService(latency)),
+                           ("sync_em_thread", LatencyCouponService(latency))):
+        elapsed = asyncio.run(run(service))
+        results[f"{label}_checkouts_per_second"] = carts / elapsed
+        print(f"async_load  {label:<15} carrinhos={carts}  latência={latency * 1e3:.0f} ms"
+              f"  {carts / elapsed:10.0f} checkouts/s  (sequencial: {1 / latency:.0f}/s)")
+    return results
+
+
+class _CoarseLockedCart(ConcurrentCart):
+    """Referência: leitores também tomam o lock de escrita (leituras serializadas)."""
+
+    def get_total(self):
+        with self._write_lock:
+            return super().get_total()
+
+
+@benchmark("concurrent_reads")
+def bench_concurrent_reads(lines=5_000, duration=0.5, readers=4):
+    """Leituras de get_total() por segundo, sem e com um escritor contínuo."""
+    results = {}
+    for label, cart_class in (("cow", ConcurrentCart), ("lock_global", _CoarseLockedCart)):
+        for with_writer in (False, True):
+            cart = cart_class()
+            cart.add_items((f"Item {i}", 1, "1.00") for i in range(lines))
+            stop = threading.Event()
+            counts = [0] * readers
+
+            def read(slot):
+                while not stop.is_set():
+                    cart.get_total()
+                    counts[slot] += 1
+
+            def write():
+                while not stop.is_set():
+                    cart.add_item("Item 0", 1, "1.00")
+
+            threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+            if with_writer:
+                threads.append(threading.Thread(target=write))
+            for thread in threads:
+                thread.start()
+            time.sleep(duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            key = f"{label}{'_com_escritor' if with_writer else ''}"
+            results[f"{key}_reads_per_second"] = sum(counts) / duration
+            print(f"concurrent_reads  {key:<26} {sum(counts) / duration:12.0f} leituras/s")
+    return results
+
+
+@benchmark("serialization")
+def bench_serialization(sizes=(1, 100, 10_000)):
+    """Ida e volta (dump + load) e tamanho do payload por formato e tamanho de carrinho."""
+    results = {}
+    for size in sizes:
+        cart = _build_cart(size)
+        cart._applied_coupon = {"type": "percentage", "value": Decimal("10")}
+        repeat = max(1, 20_000 // size)
+
+        def list_items_json():
+            payload = json.dumps([{key: str(value) for key, value in line.items()} for line in cart.list_items()])
+            restored = Cart()
+            for line in json.loads(payload):
+                restored.add_item(line["name"], int(line["quantity"]), line["unit_price"])
+            return payload
+
+        def dump_and_load(fmt, trusted):
+            def round_trip():
+                payload = cart.dump(fmt)
+                Cart.load(payload, trusted=trusted)
+                return payload
+            return round_trip
+
+        variants = {"list_items_json": list_items_json}
+        for fmt in ("binary", "json"):
+            for trusted in (False, True):
+                variants[f"{fmt}{'_confiavel' if trusted else ''}"] = dump_and_load(fmt, trusted)
+
+        results[size] = {}
+        for label, round_trip in variants.items():
+            payload_size = len(round_trip())
+            seconds = _time_per_call(round_trip, repeat)
+            results[size][label] = {"seconds": seconds, "payload_bytes": payload_size}
+            print(f"serialization  linhas={size:>6}  {label:<17} {seconds * 1e6:11.1f} µs  {payload_size:>9} bytes")
+    return results
+
+
+@benchmark("cart_store")
+def bench_cart_store(carts=1_000_000, ops_per_cart=3, transaction_size=10_000):
+    """Vazão de mutações registradas no log SQLite e tempo de recuperação de todos os carrinhos."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "carts.db")
+        store = SQLiteCartStore(path)
+        repository = CartRepository(store, snapshot_every=ops_per_cart + 1)
+        started = time.perf_counter()
+        for first in range(0, carts, transaction_size):
+            with repository.transaction():
+                for cart_id in range(first, min(first + transaction_size, carts)):
+                    cart = repository.get(str(cart_id))
+                    for op in range(ops_per_cart):
+                        cart.add_item(f"Item {op}", 1, "9.90")
+        mutations = carts * ops_per_cart / (time.perf_counter() - started)
+        store.close()
+
+        store = SQLiteCartStore(path)
+        started = time.perf_counter()
+        recovered = CartRepository(store).recover_all()
+        recovery = time.perf_counter() - started
+        store.close()
+
+    print(f"cart_store  carrinhos={carts}  {mutations:10.0f} mutações/s"
+          f"  recuperação de {recovered} carrinhos em {recovery:6.2f} s")
+    return {"mutations_per_second": mutations, "recovery_seconds": recovery}
+
+
+@benchmark("promotions")
+def bench_promotions(rules=1_000, lines=500, repeat=200):
+    """get_total() com 1k regras e 500 linhas: motor indexado vs. avaliar toda regra em toda linha."""
+    rule_list = []
+    for i in range(rules):
+        kind = i % 4
+        if kind == 0:
+            rule_list.append(ItemPercentOff(f"Item {i * 3}", (i % 30) + 1))
+        elif kind == 1:
+            rule_list.append(BuyXGetY(f"Item {i * 3}", buy=2, get=1, stackable=False))
+        elif kind == 2:
+            rule_list.append(ItemPercentOff(f"Item {i * 3}", 5, code=f"PROMO{i}"))
+        else:
+            rule_list.append(SpendThreshold(f"{i * 10}.00", amount="1.00", stackable=i % 8 == 3))
+    engine = PromotionEngine(rule_list)
+    cart = _build_cart(lines)
+    cart.promotion_engine = engine
+    cart.apply_coupon("PROMO2")
+
+    def naive():
+        discount = 0
+        for rule in rule_list:
+            if rule.code is not None and rule.code not in cart._promotion_codes:
+                continue
+            if isinstance(rule, SpendThreshold):
+                if rule.min_cents <= cart._subtotal_cents:
+                    discount += rule.order_discount_cents(cart._subtotal_cents)
+                continue
+            for name, item_obj in cart._items.items():
+                if rule.item_name == name:
+                    discount += rule.line_discount_cents(item_obj)
+        return discount
+
+    results = {"naive": _time_per_call(naive, repeat), "engine": _time_per_call(cart.get_total, repeat)}
+    print(f"promotions  regras={rules} linhas={lines}  ingênuo {results['naive'] * 1e3:8.2f} ms"
+          f"  motor {results['engine'] * 1e3:8.3f} ms")
+    return results
+
+
+@benchmark("instrumentation")
+def bench_instrumentation(lines=1_000, repeat=20_000):
+    """Custo da instrumentação em add_item/get_total: sem, ligada, desligada e removida."""
+    metrics = Instrumentation()
+    cart = _build_cart(lines)
+
+    def workload():
+        cart.add_item("Item 0", 1, "1.00")
+        cart.get_total()
+
+    results = {"plain": _best_time_per_call(workload, repeat)}
+    instrument_cart(cart, metrics)
+    results["enabled"] = _best_time_per_call(workload, repeat)
+    metrics.enabled = False
+    results["disabled"] = _best_time_per_call(workload, repeat)
+    uninstrument_cart(cart)
+    results["uninstrumented"] = _best_time_per_call(workload, repeat)
+    print("instrumentation  " + "  ".join(
+        f"{label} {seconds * 1e6:7.2f} us ({seconds / results['plain']:.2f}x)"
+        for label, seconds in results.items()
+    ))
+    return results
+
+
+@benchmark("cart_service")
+def bench_cart_service(operations=100_000, carts=10_000, batch_size=256, max_workers=None):
+    """Gerador de carga do ShardedCartService: vazão de add_item por número de workers."""
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, max_workers} & set(range(1, max_workers + 1)))
+    cart_ids = [f"cliente-{i}" for i in range(carts)]
+    results = {}
+    for workers in worker_counts:
+        with ShardedCartService(workers=workers, batch_size=batch_size) as service:
+            start = time.perf_counter()
+            futures = [
+                service.submit(cart_ids[i % carts], "add_item", f"Item {i % 50}", 1, "9.99")
+                for i in range(operations)
+            ]
+            service.flush()
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        results[f"workers_{workers}_ops_per_second"] = operations / elapsed
+        print(f"cart_service  workers={workers:<3} lote={batch_size}  {operations / elapsed:12,.0f} ops/s")
+    return results
+
+
+@benchmark("cart_views")
+def bench_cart_views(lines=50_000, repeat=200):
+    """Consultas ordenadas: list_items() + ordenação no chamador vs. views indexadas."""
+    cart = _build_cart(lines)
+    view = cart.view()
+    line_total = lambda line: line["total_price"]
+
+    def copy_top():
+        return sorted(cart.list_items(), key=line_total, reverse=True)[:10]
+
+    def copy_prefix():
+        return sorted((line for line in cart.list_items() if line["name"].startswith("Item 4999")),
+                      key=lambda line: line["name"])
+
+    def copy_page():
+        return sorted(cart.list_items(), key=lambda line: line["name"])[25_000:25_050]
+
+    copy_repeat = max(repeat // 50, 3)
+    results = {
+        "copy_top_10": _best_time_per_call(copy_top, copy_repeat),
+        "copy_prefix": _best_time_per_call(copy_prefix, copy_repeat),
+        "copy_page": _best_time_per_call(copy_page, copy_repeat),
+    }
+    start = time.perf_counter()
+    view.top_by_total(1)
+    results["index_build"] = time.perf_counter() - start
+    results["view_top_10"] = _best_time_per_call(lambda: view.top_by_total(10), repeat)
+    results["view_prefix"] = _best_time_per_call(lambda: list(view.with_prefix("Item 4999")), repeat)
+    results["view_page"] = _best_time_per_call(lambda: view.page(50, after="Item 5"), repeat)
+
+    def mutate():
+        cart.add_item("Item 123", 1, "0.99")
+        cart.remove_item("Item 123", 1)
+
+    results["indexed_mutation"] = _best_time_per_call(mutate, repeat)
+    cart._index = None
+    results["plain_mutation"] = _best_time_per_call(mutate, repeat)
+    print(f"cart_views  linhas={lines}")
+    for label, seconds in results.items():
+        print(f"  {label:<18} {seconds * 1e6:12.1f} us")
+    return results
+
+
+@benchmark("price_catalog")
+def bench_price_catalog(skus=100_000, lines=1_000, repeat=2_000):
+    """add_sku vs. add_item e custo de get_total com catálogo estável e após a troca da tabela."""
+    prices = [(sku % 9_973) + 99 for sku in range(skus)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "prices.bin")
+        write_price_table(path, prices)
+        table = PriceTable(path)
+        price_strings = [f"{cents / 100:.2f}" for cents in prices[:lines]]
+
+        def fill_manual():
+            cart = Cart()
+            for sku in range(lines):
+                cart.add_item(f"SKU {sku}", 1, price_strings[sku])
+
+        def fill_catalog():
+            cart = Cart(price_table=table)
+            for sku in range(lines):
+                cart.add_sku(sku, 1)
+            return cart
+
+        results = {
+            "add_item_cart": _best_time_per_call(fill_manual, 5),
+            "add_sku_cart": _best_time_per_call(fill_catalog, 5),
+        }
+        cart = fill_catalog()
+        results["get_total_stable"] = _best_time_per_call(cart.get_total, repeat)
+
+        def swap_and_total():
+            write_price_table(path, prices)
+            table.refresh(force=True) # Sem esperar o refresh_interval
+            cart.get_total()
+
+        results["swap_and_get_total"] = _best_time_per_call(swap_and_total, 20)
+        table.close() # Solta o mapeamento antes de apagar o diretório
+    print(f"price_catalog  skus={skus} linhas={lines}")
+    for label, seconds in results.items():
+        print(f"  {label:<20} {seconds * 1e6:12.1f} us")
+    return results
+
+
+@benchmark("order_analytics")
+def bench_order_analytics(records=500_000, lines_per_cart=8, chunk_size=50_000, processes=None):
+    """Vazão da análise em streaming de JSON lines: um processo vs. pool de processos."""
+    processes = processes or os.cpu_count() or 1
+    rng = random.Random(42)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(records):
+                cart_id = i // lines_per_cart
+                record = {"cart_id": cart_id, "name": f"Item {rng.randrange(5_000)}",
+                          "quantity": rng.randint(1, 5), "unit_price": f"{rng.randint(1, 99_999) / 100:.2f}"}
+                if cart_id % 3 == 0:
+                    record["coupon_type"], record["coupon_value"] = "percentage", "10"
+                f.write(json.dumps(record) + "\n")
+        size_mb = os.path.getsize(path) / 1e6
+
+        for label, pool in (("single", None), (f"pool_{processes}", processes)):
+            start = time.perf_counter()
+            with open(path, encoding="utf-8") as f:
+                analytics = analyze_json_lines(f, chunk_size=chunk_size, processes=pool)
+            elapsed = time.perf_counter() - start
+            results[f"{label}_records_per_second"] = records / elapsed
+            print(f"order_analytics  {label:<8} {records / elapsed:12,.0f} registros/s  {size_mb / elapsed:7.1f} MB/s"
+                  f"  carrinhos={analytics.carts}")
+
+        # Pico de memória medido à parte: o tracemalloc deixa a leitura bem mais lenta
+        tracemalloc.start()
+        with open(path, encoding="utf-8") as f:
+            analyze_json_lines(f, chunk_size=chunk_size)
+        results["single_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"order_analytics  pico de memória {results['single_peak_bytes'] / 1e6:.1f} MB"
+              f" para {size_mb:.1f} MB de entrada (bloco de {chunk_size} registros)")
+    return results
+
+
+def _legacy_price_to_units(value) -> tuple[int, int]:
+    """Conversão anterior: sempre Decimal(str(valor)), com constantes recriadas a cada chamada."""
+    price = Decimal(str(value))
+    if price < Decimal("0"):
+        raise ValueError("O preço unitário não pode ser negativo.")
+    if not price.is_finite():
+        raise ValueError("O preço unitário deve ser um número finito.")
+    exponent = price.as_tuple().exponent
+    if exponent >= 0:
+        return int(price), 0
+    return int(price.scaleb(-exponent)), -exponent
+
+
+def _legacy_add_item(cart, name, quantity, unit_price):
+    """Cart.add_item anterior: Decimal no carrinho e nova conversão dentro do Item."""
+    price_decimal = Decimal(str(unit_price))
+    if price_decimal < Decimal("0"):
+        raise ValueError("O preço unitário não pode ser negativo.")
+    if not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError("A quantidade para adicionar deve ser um inteiro positivo.")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("O nome do item não pode ser vazio.")
+    existing_item = cart._items.get(name)
+    if existing_item is not None:
+        old_cents = existing_item.total_cents
+        existing_item.quantity += quantity
+        existing_item._price_units, existing_item._price_scale = _legacy_price_to_units(price_decimal)
+        cart._line_changed(old_cents, existing_item.total_cents, name)
+    else:
+        units, scale = _legacy_price_to_units(price_decimal)
+        new_item = cart._items[name] = Item._from_units(name, quantity, units, scale)
+        cart._line_changed(0, new_item.total_cents, name)
+
+
+@benchmark("price_parsing", suite=True)
+def bench_price_parsing(repeat=50_000):
+    """Operações/s de add_item e da conversão de preço: caminho anterior vs. caminho rápido."""
+    prices = ["19.99", "0.50", "1250", 7, Decimal("3.335"), 2.5]
+    names = [f"Item {i}" for i in range(100)]
+    results = {}
+    for label, parse in (("before", _legacy_price_to_units), ("after", _price_to_units)):
+        seconds = _best_time_per_call(lambda: [parse(price) for price in prices], repeat // 10)
+        results[f"parse_{label}_per_second"] = len(prices) / seconds
+
+    cart = Cart()
+    counter = itertools.count()
+
+    def legacy():
+        i = next(counter)
+        _legacy_add_item(cart, names[i % 100], 1, prices[i % 3])
+
+    def current():
+        i = next(counter)
+        cart.add_item(names[i % 100], 1, prices[i % 3])
+
+    results["add_item_before_per_second"] = 1 / _best_time_per_call(legacy, repeat)
+    cart.clear_cart()
+    results["add_item_after_per_second"] = 1 / _best_time_per_call(current, repeat)
+    for label in ("parse", "add_item"):
+        before, after = results[f"{label}_before_per_second"], results[f"{label}_after_per_second"]
+        print(f"price_parsing  {label:<9} antes {before:12,.0f} ops/s  depois {after:12,.0f} ops/s"
+              f"  ({after / before:.2f}x)")
+    return results
+
+
+@benchmark("delta_sync")
+def bench_delta_sync(sizes=(100, 10_000, 50_000), changed_lines=3, repeat=200):
+    """Sincronização do cliente após poucas mudanças: list_items() completo vs. changes_since()."""
+    def encode(payload):
+        return json.dumps(payload, default=str).encode("utf-8")
+
+    results = {}
+    for size in sizes:
+        cart = _build_cart(size)
+        repeat_for_size = max(repeat * 100 // size, 3)
+
+        def mutate():
+            version = cart.version
+            for i in range(changed_lines):
+                cart.add_item(f"Item {i * 7}", 1, "0.99")
+            return version
+
+        def full_sync():
+            mutate()
+            return encode({"items": cart.list_items(), "total": cart.get_total()})
+
+        def delta_sync():
+            return encode(cart.changes_since(mutate()))
+
+        results[f"{size}_full_seconds"] = _best_time_per_call(full_sync, repeat_for_size)
+        results[f"{size}_delta_seconds"] = _best_time_per_call(delta_sync, repeat_for_size)
+        results[f"{size}_full_bytes"] = len(full_sync())
+        results[f"{size}_delta_bytes"] = len(delta_sync())
+        print(f"delta_sync  linhas={size:<7} completo {results[f'{size}_full_bytes']:>10,} B"
+              f" {results[f'{size}_full_seconds'] * 1e3:9.3f} ms  |  delta {results[f'{size}_delta_bytes']:>6,} B"
+              f" {results[f'{size}_delta_seconds'] * 1e3:7.3f} ms")
+    return results
+
+
+_STARTUP_SCRIPT = (
+    "import time; started = time.perf_counter()\n"
+    "import carrinho\n"
+    "cart = carrinho.Cart(); cart.add_item('Café', 2, '9.90'); cart.get_total()\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+
+def _parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Saída de python -X importtime -> {módulo: (próprio_us, acumulado_us)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+@benchmark("startup")
+def bench_startup(runs=5):
+    """Partida a frio do ponto de entrada carrinho: -X importtime e tempo até o primeiro get_total()."""
+    import subprocess
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cached_env = dict(os.environ)
+        cached_env.pop("PYTHONDONTWRITEBYTECODE", None)
+        cached_env["PYTHONPYCACHEPREFIX"] = cache_dir
+        here = os.path.dirname(os.path.abspath(__file__))
+        # "sem_pyc" compila os módulos do projeto a cada execução (-B, sem gravar .pyc);
+        # "com_pyc" usa o cache gravado por uma execução anterior
+        for label, extra, env in (("sem_pyc", ["-B"], None), ("com_pyc", [], cached_env)):
+            if env is not None:
+                subprocess.run([sys.executable, "-c", "import carrinho"], cwd=here, env=env, check=True)
+            first_total, imports, wall = [], [], []
+            for _ in range(runs):
+                start = time.perf_counter()
+                done = subprocess.run([sys.executable, *extra, "-X", "importtime", "-c", _STARTUP_SCRIPT],
+                                      cwd=here, env=env, capture_output=True, text=True, check=True)
+                wall.append(time.perf_counter() - start)
+                first_total.append(float(done.stdout))
+                modules = _parse_importtime(done.stderr)
+                imports.append(modules["carrinho"][1] / 1e6)
+            results[f"{label}_import_seconds"] = min(imports)
+            results[f"{label}_first_total_seconds"] = min(first_total)
+            results[f"{label}_process_seconds"] = min(wall)
+            slowest = sorted(modules.items(), key=lambda entry: entry[1][0], reverse=True)[:5]
+            print(f"startup  {label}  import carrinho {min(imports) * 1e3:6.2f} ms"
+                  f"  até o 1º get_total {min(first_total) * 1e3:6.2f} ms  processo {min(wall) * 1e3:6.1f} ms")
+            print("         mais lentos: " + ", ".join(f"{name} {self_us / 1e3:.2f} ms" for name, (self_us, _) in slowest))
+    return results
+
+
+class _DictItem:
+    """Layout anterior do Item (__dict__ por instância + Decimal), para comparação."""
+
+    def __init__(self, name, quantity, unit_price):
+        self._name = name
+        self._quantity = quantity
+        self._unit_price = Decimal(str(unit_price))
+
+
+def _traced_bytes(factory, count: int) -> int:
+    """Memória (bytes) retida por `count` objetos criados por `factory`."""
+    prices = [f"{(i % 997) + 0.99:.2f}" for i in range(count)]
+    names = [f"Item {i}" for i in range(count)]
+    tracemalloc.start()
+    try:
+        objects = [factory(names[i], 1, prices[i]) for i in range(count)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return current
+
+
+@benchmark("item_memory")
+def bench_item_memory(count=1_000_000):
+    """Compara a memória de `count` itens no layout antigo e no compacto (__slots__)."""
+    before = _traced_bytes(_DictItem, count)
+    after = _traced_bytes(Item, count)
+    print(f"item_memory  itens={count}  antes {before / count:6.1f} B/item"
+          f"  depois {after / count:6.1f} B/item  ({after / before:.0%})")
+    return {"before_bytes": before, "after_bytes": after}
+
+
+def _flatten(results: dict, prefix: str = "") -> dict:
+    """Achata resultados aninhados em {"benchmark/chave/...": valor}."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lista as métricas que pioraram mais que `threshold` (fração) em relação ao baseline."""
+    current, baseline = _flatten(current), _flatten(baseline)
+    regressions = []
+    for metric, value in sorted(current.items()):
+        reference = baseline.get(metric)
+        if not reference:
+            continue
+        if metric.endswith("_per_second"):
+            change = (reference - value) / reference
+        else:
+            change = (value - reference) / reference
+        if change > threshold:
+            regressions.append(f"{metric}: {reference:.6g} -> {value:.6g} ({change:+.1%} pior)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do carrinho de compras.")
+    parser.add_argument("names", nargs="*", help="benchmarks a rodar (padrão: a suíte de regressão)")
+    parser.add_argument("--all", action="store_true", help="roda todos os benchmarks registrados")
+    parser.add_argument("--list", action="store_true", help="lista os benchmarks e sai")
+    parser.add_argument("--sizes", help="tamanhos de carrinho separados por vírgula (ex.: 1,100,10000)")
+    parser.add_argument("--output", help="grava os resultados em JSON neste arquivo")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="piora relativa tolerada antes de acusar regressão (padrão: 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, func in BENCHMARKS.items():
+            print(f"{name:<18} {'[suíte] ' if name in SUITE else ''}{(func.__doc__ or '').strip()}")
+        return 0
+
+    names = args.names or (list(BENCHMARKS) if args.all else SUITE)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Benchmark desconhecido: {', '.join(unknown)}")
+
+    options = {}
+    if args.sizes:
+        options["sizes"] = tuple(int(size) for size in args.sizes.split(","))
+
+    results = {}
+    for name in names:
+        func = BENCHMARKS[name]
+        parameters = inspect.signature(func).parameters
+        accepted = {key: value for key, value in options.items() if key in parameters}
+        results[name] = func(**accepted)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSÃO  {regression}")
+        if regressions:
+            return 1
+        print(f"Sem regressões acima de {args.threshold:.0%} em relação a {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# carrinho.py
+"""
+Ponto de entrada leve do carrinho, pensado para workers de inicialização rápida.
+
+Na importação só Cart e Item (e o módulo decimal) são carregados. Os demais
+subsistemas (serviços de cupom, cache, asyncio, persistência em SQLite,
+promoções, precificação em lote com NumPy, análises, catálogo, serviço
+multiprocesso, instrumentação) são importados no primeiro acesso ao nome,
+via __getattr__ de módulo (PEP 562), e ficam em cache no próprio módulo.
+
+Exemplo:
+    import carrinho
+    cart = carrinho.Cart(coupon_service=carrinho.CouponService())  # importa coupon_service agora
+"""
+from item import Item
+from shopping_cart import Cart
+
+_LAZY = {
+    "CouponService": "coupon_service",
+    "LatencyCouponService": "coupon_service",
+    "CachedCouponService": "coupon_cache",
+    "AsyncCart": "async_cart",
+    "AsyncCouponService": "async_cart",
+    "ConcurrentCart": "concurrent_cart",
+    "CartRepository": "cart_store",
+    "PersistentCart": "cart_store",
+    "InMemoryCartStore": "cart_store",
+    "SQLiteCartStore": "cart_store",
+    "PromotionEngine": "promotions",
+    "ItemPercentOff": "promotions",
+    "BuyXGetY": "promotions",
+    "SpendThreshold": "promotions",
+    "price_carts": "batch_pricing",
+    "price_columns": "batch_pricing",
+    "read_csv_lines": "cart_import",
+    "read_json_lines": "cart_import",
+    "OrderAnalytics": "order_analytics",
+    "analyze_csv": "order_analytics",
+    "analyze_json_lines": "order_analytics",
+    "PriceTable": "price_catalog",
+    "write_price_table": "price_catalog",
+    "ShardedCartService": "cart_service",
+    "Instrumentation": "instrumentation",
+    "instrument_cart": "instrumentation",
+    "uninstrument_cart": "instrumentation",
+    "CartView": "cart_views",
+}
+
+__all__ = ["Cart", "Item", *_LAZY]
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib # Só é necessário no primeiro acesso a um subsistema
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value # Próximos acessos não passam por aqui
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,54 @@
+# cart_import.py
+"""
+Leitores de linhas de carrinho em CSV e JSON lines, para uso com Cart.add_items.
+
+Exemplo:
+    with open("cesta.csv", newline="", encoding="utf-8") as f:
+        cart.add_items(read_csv_lines(f))
+"""
+import csv
+import json
+
+
+def _to_quantity(value):
+    """Converte a quantidade lida do arquivo para int quando possível."""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value # O carrinho rejeita com a mensagem padrão de quantidade
+    return value
+
+
+def read_csv_lines(stream):
+    """
+    Gera dicionários de linha a partir de um CSV com cabeçalho
+    name,quantity,unit_price. O preço é mantido como texto para não perder precisão.
+    """
+    for row in csv.DictReader(stream):
+        yield {
+            "name": row.get("name"),
+            "quantity": _to_quantity(row.get("quantity")),
+            "unit_price": row.get("unit_price"),
+        }
+
+
+def read_json_lines(stream):
+    """
+    Gera linhas a partir de JSON lines: cada linha não vazia é um objeto
+    {"name", "quantity", "unit_price"} ou uma lista [nome, quantidade, preço].
+    """
+    for raw_line in stream:
+        raw_line = raw_line.strip()
+        if not raw_line:
+            continue
+        # parse_float=str preserva as casas decimais do preço como no CSV
+        record = json.loads(raw_line, parse_float=str)
+        if isinstance(record, dict):
+            yield {
+                "name": record.get("name"),
+                "quantity": record.get("quantity"),
+                "unit_price": record.get("unit_price"),
+            }
+        else:
+            yield tuple(record)
@@ -0,0 +1,212 @@
+# cart_serialization.py
+"""
+Serialização compacta de carrinhos, usada por Cart.dump() / Cart.load().
+
+Formato binário (little-endian):
+    cabeçalho  "CRT" + versão (1 byte)
+    cupom      1 byte (0 = sem cupom, 1 = com cupom), seguido de tipo e valor
+               como textos UTF-8 prefixados pelo tamanho (uint16)
+    itens      quantidade de linhas (uint32); 4 bytes com o código struct
+               (B, H, I ou Q) de cada coluna; as colunas inteiras, uma após a
+               outra: tamanho do nome (em caracteres), quantidade, preço em
+               unidades inteiras e escala do preço; e, até o fim dos dados,
+               os nomes concatenados em UTF-8
+
+Cada coluna usa o menor inteiro sem sinal que comporta o seu maior valor, então
+uma linha típica ocupa o nome mais 7 bytes, e cada coluna é gravada e lida com
+uma única chamada a struct.
+
+Formato JSON:
+    {"v": 1, "coupon": {"type": ..., "value": "10"} | null,
+     "items": [[nome, quantidade, unidades, escala], ...]}
+
+Do cupom são gravados apenas o tipo e o valor, que é o que get_total() usa.
+"""
+import itertools
+import json
+import struct
+from decimal import Decimal
+
+from item import Item, _units_to_decimal
+
+FORMAT_VERSION = 1
+_MAGIC = b"CRT"
+_HEADER = struct.Struct("<3sB")
+_LENGTH = struct.Struct("<H")
+_COUNT = struct.Struct("<I")
+_WIDTHS = struct.Struct("<4s")
+_COLUMN_SIZES = {"B": 1, "H": 2, "I": 4, "Q": 8}  # Código struct sem sinal -> bytes
+_CODE_FOR_BYTES = "BBHIIQQQQ"  # Menor código para um valor de n bytes (0 a 8)
+
+
+def _coupon_fields(coupon) -> tuple[str, str] | None:
+    if not coupon:
+        return None
+    return str(coupon.get("type")), str(coupon.get("value", 0))
+
+
+def _pack_text(text: str) -> bytes:
+    encoded = text.encode("utf-8")
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _column_code(values) -> str:
+    """Menor código struct sem sinal que comporta todos os valores."""
+    if not values:
+        return "B"
+    # Valores negativos ou acima de 8 bytes estouram no pack
+    return _CODE_FOR_BYTES[min((max(values).bit_length() + 7) // 8, 8)]
+
+
+def dump_binary(cart) -> bytes:
+    try:
+        parts = [_HEADER.pack(_MAGIC, FORMAT_VERSION)]
+        coupon = _coupon_fields(cart._applied_coupon)
+        if coupon is None:
+            parts.append(b"\x00")
+        else:
+            parts.append(b"\x01")
+            parts.append(_pack_text(coupon[0]))
+            parts.append(_pack_text(coupon[1]))
+
+        items = cart._items
+        item_objs = items.values()
+        columns = (
+            [len(name) for name in items],
+            [item_obj._quantity for item_obj in item_objs],
+            [item_obj._price_units for item_obj in item_objs],
+            [item_obj._price_scale for item_obj in item_objs],
+        )
+        codes = [_column_code(column) for column in columns]
+        count = len(items)
+        parts.append(_COUNT.pack(count))
+        parts.append(_WIDTHS.pack("".join(codes).encode("ascii")))
+        for code, column in zip(codes, columns):
+            parts.append(struct.pack(f"<{count}{code}", *column))
+        parts.append("".join(items).encode("utf-8"))
+    except struct.error as e:
+        raise ValueError(f"Carrinho não cabe no formato binário: {e}")
+    return b"".join(parts)
+
+
+def _read_text(data, offset: int) -> tuple[str, int]:
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    if offset + length > len(data):
+        raise IndexError("texto truncado")
+    return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def _read_lines(data, offset: int) -> list:
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    (codes,) = _WIDTHS.unpack_from(data, offset)
+    offset += _WIDTHS.size
+    columns = []
+    for code in codes.decode("ascii"):
+        size = _COLUMN_SIZES.get(code)
+        if size is None:
+            raise struct.error(f"largura de coluna desconhecida: {codes!r}")
+        columns.append(struct.unpack_from(f"<{count}{code}", data, offset))
+        offset += count * size
+    lengths, quantities, units, scales = columns
+
+    names_text = bytes(data[offset:]).decode("utf-8")
+    if len(names_text) != sum(lengths):
+        raise IndexError("nomes truncados")
+    ends = list(itertools.accumulate(lengths))
+    names = [names_text[end - length:end] for end, length in zip(ends, lengths)]
+    return list(zip(names, quantities, units, scales))
+
+
+def load_binary(data) -> tuple[list, tuple[str, str] | None]:
+    """Retorna (linhas [(nome, quantidade, unidades, escala)], cupom (tipo, valor) ou None)."""
+    try:
+        magic, version = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Cabeçalho ou versão de formato desconhecidos.")
+        offset = _HEADER.size
+
+        coupon = None
+        has_coupon = data[offset]
+        offset += 1
+        if has_coupon:
+            coupon_type, offset = _read_text(data, offset)
+            coupon_value, offset = _read_text(data, offset)
+            coupon = (coupon_type, coupon_value)
+
+        lines = _read_lines(data, offset)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Dados binários de carrinho inválidos: {e}")
+    return lines, coupon
+
+
+def dump_json(cart) -> str:
+    coupon = _coupon_fields(cart._applied_coupon)
+    return json.dumps({
+        "v": FORMAT_VERSION,
+        "coupon": None if coupon is None else {"type": coupon[0], "value": coupon[1]},
+        "items": [
+            [name, item_obj._quantity, item_obj._price_units, item_obj._price_scale]
+            for name, item_obj in cart._items.items()
+        ],
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_json(data) -> tuple[list, tuple[str, str] | None]:
+    try:
+        document = json.loads(data)
+        if document.get("v") != FORMAT_VERSION:
+            raise ValueError("Versão de formato desconhecida.")
+        coupon = document.get("coupon")
+        if coupon is not None:
+            coupon = (coupon["type"], coupon["value"])
+        return [tuple(line) for line in document["items"]], coupon
+    except (KeyError, TypeError, AttributeError, json.JSONDecodeError) as e:
+        raise ValueError(f"JSON de carrinho inválido: {e}")
+
+
+def dump(cart, fmt: str = "binary") -> bytes | str:
+    if fmt == "binary":
+        return dump_binary(cart)
+    if fmt == "json":
+        return dump_json(cart)
+    raise ValueError(f"Formato de serialização desconhecido: {fmt}")
+
+
+def load(data, cart_class, coupon_service=None, trusted: bool = False):
+    """
+    Reconstrói um carrinho de `cart_class` a partir de dump_binary/dump_json
+    (o formato é detectado pelo tipo e cabeçalho dos dados).
+
+    Com trusted=True os itens são recriados sem revalidação; use apenas para
+    dados gerados por este módulo e guardados em local confiável. Caso contrário
+    as linhas passam por Cart.add_items e o cupom por Cart._set_coupon.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:3]) == _MAGIC:
+        lines, coupon = load_binary(data)
+    else:
+        lines, coupon = load_json(data)
+
+    cart = cart_class(coupon_service=coupon_service)
+    coupon_data = None if coupon is None else {"type": coupon[0], "value": coupon[1]}
+    if trusted:
+        items = {
+            name: Item._from_units(name, quantity, units, scale)
+            for name, quantity, units, scale in lines
+        }
+        if coupon_data is not None:
+            coupon_data["value"] = Decimal(coupon_data["value"])
+        cart._restore(items, coupon_data)
+        return cart
+
+    try:
+        cart.add_items(
+            (name, quantity, _units_to_decimal(units, scale))
+            for name, quantity, units, scale in lines
+        )
+    except (TypeError, ValueError, ArithmeticError) as e:
+        raise ValueError(f"Linha de carrinho inválida: {e}")
+    if coupon_data is not None and not cart._set_coupon(coupon_data):
+        raise ValueError("Cupom inválido nos dados do carrinho.")
+    return cart
@@ -0,0 +1,268 @@
+# cart_service.py
+"""
+Serviço de carrinhos distribuído em processos de trabalho.
+
+Cada carrinho pertence a um único worker, escolhido por crc32(cart_id) % workers,
+e só esse processo guarda e altera o seu Cart. O cliente envia as operações por
+filas do multiprocessing em lotes: submit() acumula os pedidos por shard e envia
+o lote ao atingir batch_size (ou em flush()). Cada worker responde por um Pipe
+próprio e uma thread coletora resolve os Futures correspondentes.
+
+Cada pedido e cada resposta é serializado (pickle) individualmente: um argumento
+ou resultado que não pode ser serializado falha só o próprio Future, sem
+derrubar o lote. Se o processo de um worker morre, a thread coletora falha os
+pedidos pendentes daquele shard e novos pedidos para ele são recusados.
+
+Exemplo:
+    with ShardedCartService(workers=4) as service:
+        service.add_item("cliente-1", "Café", 2, "10.00")
+        service.apply_coupon("cliente-1", "SAVE10")
+        service.get_total("cliente-1")   # Decimal('18.00')
+"""
+import itertools
+import multiprocessing
+import pickle
+import threading
+import zlib
+from concurrent.futures import Future
+from multiprocessing import connection
+
+from coupon_service import CouponService
+from shopping_cart import Cart
+
+OPERATIONS = frozenset({
+    "add_item", "add_sku", "remove_item", "add_items", "remove_items",
+    "apply_coupon", "get_total", "list_items", "clear_cart",
+})
+
+
+def shard_for(cart_id, workers: int) -> int:
+    """Índice do worker dono do carrinho (estável entre execuções e processos)."""
+    return zlib.crc32(str(cart_id).encode("utf-8")) % workers
+
+
+def _worker_main(requests, responses, coupon_service_factory, price_table_path=None,
+                 price_refresh_interval=1.0):
+    """Laço do worker: executa cada lote recebido e devolve um lote de respostas."""
+    coupon_service = coupon_service_factory() if coupon_service_factory else None
+    price_table = None
+    if price_table_path is not None:
+        from price_catalog import PriceTable
+        price_table = PriceTable(price_table_path, price_refresh_interval) # Mapeamento compartilhado entre os workers
+    carts = {}
+    while True:
+        batch = requests.get()
+        if batch is None:
+            if price_table is not None:
+                price_table.close()
+            return
+        results = []
+        for payload in batch:
+            request_id, cart_id, operation, args = pickle.loads(payload)
+            cart = carts.get(cart_id)
+            if cart is None:
+                cart = carts[cart_id] = Cart(coupon_service=coupon_service, price_table=price_table)
+            try:
+                results.append((request_id, True, getattr(cart, operation)(*args)))
+            except Exception as e:
+                results.append((request_id, False, e))
+        responses.send_bytes(_dump_results(results))
+
+
+def _dump_results(results) -> bytes:
+    """Serializa o lote de respostas; as que não podem ser serializadas viram erro só do próprio pedido."""
+    try:
+        return pickle.dumps(results)
+    except Exception:
+        pass
+    safe = []
+    for request_id, ok, value in results:
+        try:
+            pickle.dumps(value)
+        except Exception as e:
+            ok, value = False, RuntimeError(f"Resposta não serializável: {e!r}")
+        safe.append((request_id, ok, value))
+    return pickle.dumps(safe)
+
+
+class ShardedCartService:
+    """
+    Front-end dos workers. Os métodos add_item, remove_item, apply_coupon,
+    get_total etc. recebem o cart_id seguido dos argumentos de Cart e esperam a
+    resposta; submit() devolve um Future e permite agrupar muitos pedidos.
+    Exceções levantadas pelo Cart no worker são propagadas ao chamador.
+
+    Com price_table_path, cada worker mapeia a mesma tabela de preços
+    (price_catalog) e add_sku fica disponível; price_refresh_interval é o
+    intervalo mínimo, em segundos, entre verificações de troca da tabela.
+    """
+    def __init__(self, workers: int | None = None, coupon_service_factory=CouponService,
+                 batch_size: int = 64, timeout: float | None = 30.0, context=None,
+                 price_table_path: str | None = None, price_refresh_interval: float = 1.0):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers < 1:
+            raise ValueError("O número de workers deve ser pelo menos 1.")
+        if batch_size < 1:
+            raise ValueError("O tamanho do lote deve ser pelo menos 1.")
+        context = context or multiprocessing.get_context()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._requests = [context.Queue() for _ in range(workers)]
+        # Uma conexão de resposta por worker: um processo que morre no meio de uma
+        # escrita não deixa travada a fila dos outros shards. A ponta de escrita é
+        # fechada logo após o start, então só o próprio worker a mantém aberta e
+        # a sua morte aparece como EOF.
+        self._responses, self._processes = [], []
+        for queue in self._requests:
+            reader, writer = context.Pipe(duplex=False)
+            process = context.Process(target=_worker_main,
+                                      args=(queue, writer, coupon_service_factory, price_table_path,
+                                            price_refresh_interval),
+                                      daemon=True)
+            process.start()
+            writer.close()
+            self._responses.append(reader)
+            self._processes.append(process)
+
+        self._buffers = [[] for _ in range(workers)]
+        self._pending = {}  # {request_id: (Future, shard)}
+        self._dead_shards = set()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def _collect(self):
+        """Resolve as respostas de todos os workers até que todos tenham terminado."""
+        shard_of = {}
+        for shard, (reader, process) in enumerate(zip(self._responses, self._processes)):
+            shard_of[reader] = shard_of[process.sentinel] = shard
+        while shard_of:
+            for ready in connection.wait(list(shard_of)):
+                shard = shard_of.get(ready)
+                if shard is None:
+                    continue # Já tratado nesta rodada
+                reader = self._responses[shard]
+                if ready is reader:
+                    try:
+                        self._resolve(reader.recv_bytes())
+                        continue
+                    except EOFError:
+                        pass
+                self._worker_finished(shard)
+                del shard_of[reader], shard_of[self._processes[shard].sentinel]
+
+    def _resolve(self, results):
+        results = pickle.loads(results)
+        with self._lock:
+            futures = [(self._pending.pop(request_id)[0], ok, value) for request_id, ok, value in results]
+        for future, ok, value in futures:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _worker_finished(self, shard: int):
+        """Lê as últimas respostas do worker que terminou e falha o que ficou pendente no shard."""
+        reader, process = self._responses[shard], self._processes[shard]
+        try:
+            while reader.poll():
+                self._resolve(reader.recv_bytes())
+        except EOFError:
+            pass
+        process.join()
+        with self._lock:
+            self._dead_shards.add(shard)
+            self._buffers[shard] = []
+            failed = [request_id for request_id, (_, owner) in self._pending.items() if owner == shard]
+            futures = [self._pending.pop(request_id)[0] for request_id in failed]
+        self._requests[shard].cancel_join_thread() # Ninguém mais lê esta fila
+        for future in futures:
+            future.set_exception(RuntimeError(f"O worker do shard {shard} terminou (código {process.exitcode})."))
+
+    def _send(self, shard: int):
+        """Envia o buffer do shard (chamado com self._lock adquirido)."""
+        batch = self._buffers[shard]
+        if batch:
+            self._buffers[shard] = []
+            self._requests[shard].put(batch)
+
+    def submit(self, cart_id, operation: str, *args) -> Future:
+        """Enfileira a operação no shard do carrinho; o lote é enviado ao encher ou em flush()."""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Operação desconhecida: {operation}")
+        future = Future()
+        shard = shard_for(cart_id, self.workers)
+        request_id = next(self._ids)
+        try:
+            payload = pickle.dumps((request_id, cart_id, operation, args))
+        except Exception as e:
+            future.set_exception(e) # Só este pedido falha; o lote segue
+            return future
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("O serviço de carrinhos já foi encerrado.")
+            if shard in self._dead_shards:
+                raise RuntimeError(f"O worker do shard {shard} terminou; o carrinho {cart_id!r} não está disponível.")
+            self._pending[request_id] = (future, shard)
+            self._buffers[shard].append(payload)
+            if len(self._buffers[shard]) >= self.batch_size:
+                self._send(shard)
+        return future
+
+    def flush(self):
+        """Envia todos os pedidos ainda acumulados."""
+        with self._lock:
+            for shard in range(self.workers):
+                self._send(shard)
+
+    def call(self, cart_id, operation: str, *args):
+        """Envia a operação imediatamente (com o que já estiver no buffer) e espera o resultado."""
+        future = self.submit(cart_id, operation, *args)
+        self.flush()
+        return future.result(self.timeout)
+
+    def add_item(self, cart_id, name, quantity, unit_price):
+        return self.call(cart_id, "add_item", name, quantity, unit_price)
+
+    def add_sku(self, cart_id, sku, quantity, name=None):
+        return self.call(cart_id, "add_sku", sku, quantity, name)
+
+    def remove_item(self, cart_id, name, quantity_to_remove=None):
+        return self.call(cart_id, "remove_item", name, quantity_to_remove)
+
+    def apply_coupon(self, cart_id, coupon_code):
+        return self.call(cart_id, "apply_coupon", coupon_code)
+
+    def get_total(self, cart_id):
+        return self.call(cart_id, "get_total")
+
+    def list_items(self, cart_id):
+        return self.call(cart_id, "list_items")
+
+    def close(self):
+        """Envia o que estiver pendente, encerra os workers e a thread coletora."""
+        with self._lock:
+            if self._closed:
+                return
+            for shard in range(self.workers):
+                self._send(shard)
+            self._closed = True
+            dead_shards = set(self._dead_shards)
+        for shard, queue in enumerate(self._requests):
+            if shard not in dead_shards:
+                queue.put(None)
+        for process in self._processes:
+            process.join()
+        self._collector.join()
+        for reader in self._responses:
+            reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
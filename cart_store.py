@@ -0,0 +1,298 @@
+# cart_store.py
+"""
+Persistência de carrinhos por ID com log de operações (append-only) e snapshots.
+
+Cada mutação de um PersistentCart grava um registro pequeno no log do backend;
+a cada `snapshot_every` operações o carrinho é gravado inteiro (Cart.dump) e o
+log anterior daquele carrinho é descartado. A recuperação carrega o último
+snapshot e reaplica as operações gravadas depois dele.
+
+Backends implementam:
+    append(cart_id, op, payload)        -> grava uma operação
+    save_snapshot(cart_id, data)        -> grava o snapshot e descarta o log anterior
+    load(cart_id)                       -> (snapshot ou None, [(op, payload), ...])
+    load_all()                          -> itera (cart_id, snapshot ou None, [(op, payload), ...])
+    transaction()                       -> context manager que agrupa gravações e as desfaz se falhar
+"""
+import contextlib
+import itertools
+import json
+import sqlite3
+
+from shopping_cart import Cart
+
+class InMemoryCartStore:
+    """
+    Backend em memória, útil em testes e como referência da interface.
+    Dentro de transaction() cada gravação guarda como desfazê-la; se a transação
+    mais externa falhar, as gravações são desfeitas em ordem inversa.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._operations = {}
+        self._depth = 0
+        self._undo = []  # Funções que desfazem as gravações da transação em andamento
+
+    def append(self, cart_id, op, payload):
+        operations = self._operations.setdefault(cart_id, [])
+        operations.append((op, payload))
+        if self._depth:
+            self._undo.append(lambda: self._drop_last(cart_id, operations))
+
+    def save_snapshot(self, cart_id, data):
+        if self._depth:
+            previous = (self._snapshots.get(cart_id), self._operations.get(cart_id))
+            self._undo.append(lambda: self._restore_cart(cart_id, *previous))
+        self._snapshots[cart_id] = data
+        self._operations.pop(cart_id, None)
+
+    def _drop_last(self, cart_id, operations):
+        operations.pop()
+        if not operations and self._operations.get(cart_id) is operations:
+            del self._operations[cart_id]
+
+    def _restore_cart(self, cart_id, snapshot, operations):
+        if snapshot is None:
+            self._snapshots.pop(cart_id, None)
+        else:
+            self._snapshots[cart_id] = snapshot
+        if operations is None:
+            self._operations.pop(cart_id, None)
+        else:
+            self._operations[cart_id] = operations
+
+    def load(self, cart_id):
+        return self._snapshots.get(cart_id), list(self._operations.get(cart_id, ()))
+
+    def load_all(self):
+        for cart_id in self._snapshots.keys() | self._operations.keys():
+            yield (cart_id, *self.load(cart_id))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                undo, self._undo = self._undo, []
+                for action in reversed(undo):
+                    action()
+            raise
+        else:
+            self._depth -= 1
+            if self._depth == 0:
+                self._undo = []
+
+
+class SQLiteCartStore:
+    """
+    Backend SQLite (arquivo local, sem serviços externos), em modo WAL.
+    Cada append é uma inserção sequencial; dentro de transaction() várias
+    mutações são confirmadas de uma vez.
+    """
+    def __init__(self, path: str, synchronous: str = "NORMAL"):
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                cart_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS operations (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                cart_id TEXT NOT NULL,
+                op TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS operations_by_cart ON operations (cart_id, seq);
+        """)
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def transaction(self):
+        if self._depth == 0:
+            self._conn.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def append(self, cart_id, op, payload):
+        self._conn.execute(
+            "INSERT INTO operations (cart_id, op, payload) VALUES (?, ?, ?)",
+            (cart_id, op, json.dumps(payload, separators=(",", ":"))),
+        )
+
+    def save_snapshot(self, cart_id, data):
+        with self.transaction():
+            self._conn.execute(
+                "INSERT INTO snapshots (cart_id, data) VALUES (?, ?) "
+                "ON CONFLICT (cart_id) DO UPDATE SET data = excluded.data",
+                (cart_id, data),
+            )
+            self._conn.execute("DELETE FROM operations WHERE cart_id = ?", (cart_id,))
+
+    def load(self, cart_id):
+        row = self._conn.execute("SELECT data FROM snapshots WHERE cart_id = ?", (cart_id,)).fetchone()
+        operations = self._conn.execute(
+            "SELECT op, payload FROM operations WHERE cart_id = ? ORDER BY seq", (cart_id,)
+        ).fetchall()
+        return (row[0] if row else None), [(op, json.loads(payload)) for op, payload in operations]
+
+    def load_all(self):
+        snapshots = dict(self._conn.execute("SELECT cart_id, data FROM snapshots"))
+        rows = self._conn.execute("SELECT cart_id, op, payload FROM operations ORDER BY cart_id, seq")
+        for cart_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+            yield cart_id, snapshots.pop(cart_id, None), [(op, json.loads(payload)) for _, op, payload in group]
+        for cart_id, data in snapshots.items():
+            yield cart_id, data, []
+
+    def close(self):
+        self._conn.close()
+
+
+def _coupon_payload(coupon_data):
+    if not coupon_data:
+        return None
+    return {"type": coupon_data.get("type"), "value": str(coupon_data.get("value", 0))}
+
+
+class PersistentCart(Cart):
+    """Cart que registra cada mutação bem-sucedida no repositório de origem."""
+
+    def __init__(self, repository, cart_id, coupon_service=None):
+        super().__init__(coupon_service=coupon_service)
+        self._repository = repository
+        self.cart_id = cart_id
+        self._pending_operations = 0  # Operações no log desde o último snapshot
+
+    def add_item(self, name, quantity, unit_price):
+        super().add_item(name, quantity, unit_price)
+        self._repository._record(self, "add_item", [name, quantity, str(unit_price)])
+
+    def remove_item(self, name, quantity_to_remove=None):
+        if name not in self._items:
+            return # Nada a registrar
+        super().remove_item(name, quantity_to_remove)
+        self._repository._record(self, "remove_item", [name, quantity_to_remove])
+
+    def add_items(self, lines):
+        lines = [
+            [line.get("name"), line.get("quantity"), line.get("unit_price")] if isinstance(line, dict) else list(line)
+            for line in lines
+        ]
+        super().add_items(lines)
+        self._repository._record(self, "add_items", [[n, q, str(p)] for n, q, p in lines])
+
+    def remove_items(self, lines):
+        lines = list(lines)
+        super().remove_items(lines)
+        self._repository._record(self, "remove_items", lines)
+
+    def _set_coupon(self, coupon_data):
+        applied = super()._set_coupon(coupon_data)
+        self._repository._record(self, "coupon", _coupon_payload(self._applied_coupon))
+        return applied
+
+    def clear_cart(self):
+        super().clear_cart()
+        self._repository._record(self, "clear_cart", None)
+
+
+# Reaplicação das operações do log usando os métodos do Cart (sem registrar de novo)
+_REPLAY = {
+    "add_item": lambda cart, payload: Cart.add_item(cart, *payload),
+    "remove_item": lambda cart, payload: Cart.remove_item(cart, *payload),
+    "add_items": lambda cart, payload: Cart.add_items(cart, payload),
+    "remove_items": lambda cart, payload: Cart.remove_items(
+        cart, [line if isinstance(line, (str, dict)) else tuple(line) for line in payload]),
+    "coupon": lambda cart, payload: Cart._set_coupon(cart, payload),
+    "clear_cart": lambda cart, payload: Cart.clear_cart(cart),
+}
+
+
+class CartRepository:
+    """
+    Repositório de carrinhos por ID sobre um backend (InMemoryCartStore, SQLiteCartStore).
+
+    get() devolve o PersistentCart em memória ou o recupera do backend.
+    """
+    def __init__(self, store, coupon_service=None, snapshot_every: int = 100):
+        self.store = store
+        self.coupon_service = coupon_service
+        self.snapshot_every = snapshot_every
+        self._carts = {}
+        self._transaction_depth = 0
+        self._touched = set()  # cart_ids alterados na transação em andamento
+
+    def get(self, cart_id) -> PersistentCart:
+        cart = self._carts.get(cart_id)
+        if cart is None:
+            cart = self._recover(cart_id, *self.store.load(cart_id))
+        return cart
+
+    def recover_all(self) -> int:
+        """Recupera todos os carrinhos do backend para a memória. Retorna quantos foram carregados."""
+        count = 0
+        for cart_id, snapshot, operations in self.store.load_all():
+            self._recover(cart_id, snapshot, operations)
+            count += 1
+        return count
+
+    def _recover(self, cart_id, snapshot, operations) -> PersistentCart:
+        cart = PersistentCart(self, cart_id, coupon_service=self.coupon_service)
+        if snapshot is not None:
+            restored = Cart.load(snapshot, trusted=True)
+            Cart._restore(cart, restored._items, restored._applied_coupon)
+        for op, payload in operations:
+            _REPLAY[op](cart, payload)
+        cart._pending_operations = len(operations)
+        self._carts[cart_id] = cart
+        return cart
+
+    def _record(self, cart, op, payload):
+        if self._transaction_depth:
+            self._touched.add(cart.cart_id)
+        self.store.append(cart.cart_id, op, payload)
+        cart._pending_operations += 1
+        if cart._pending_operations >= self.snapshot_every:
+            self.compact(cart.cart_id)
+
+    def compact(self, cart_id):
+        """Grava o snapshot do carrinho e descarta o log anterior a ele."""
+        cart = self._carts[cart_id]
+        self.store.save_snapshot(cart_id, cart.dump("binary"))
+        cart._pending_operations = 0
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Agrupa várias mutações em uma única confirmação no backend. Se a
+        transação mais externa for desfeita, os carrinhos alterados nela saem
+        da memória e o próximo get() os recupera do estado confirmado.
+        """
+        self._transaction_depth += 1
+        try:
+            with self.store.transaction():
+                yield
+        except BaseException:
+            if self._transaction_depth == 1:
+                for cart_id in self._touched:
+                    self._carts.pop(cart_id, None)
+            raise
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._touched.clear()
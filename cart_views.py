@@ -0,0 +1,143 @@
+# cart_views.py
+"""
+Views preguiçosas sobre os itens de um Cart, sem copiar nem gerar dicionários.
+
+Cart.view() devolve um CartView que lê o próprio carrinho: iterar produz os
+objetos Item já armazenados (devem ser tratados como somente leitura). As
+consultas ordenadas usam um CartIndex criado no primeiro uso e mantido pelo
+Cart a cada mutação:
+
+    - nomes em ordem alfabética, para busca por prefixo e paginação por cursor;
+    - chaves (-total_em_centavos, nome), para os N maiores totais de linha.
+
+Com o índice ativo, cada mutação custa uma busca binária e uma inserção na
+lista ordenada (O(n) de cópia de memória, barata mesmo com dezenas de
+milhares de linhas). Carrinhos que nunca chamam view() não pagam nada.
+
+ConcurrentCart.view() devolve um ConcurrentCartView, seguro para leitura
+enquanto outras threads escrevem.
+"""
+import bisect
+import itertools
+
+
+class CartIndex:
+    """Índices secundários sobre cart._items."""
+
+    def __init__(self, cart):
+        self._cart = cart
+        self._totals = {name: item_obj.total_cents for name, item_obj in cart._items.items()}
+        self._names = sorted(self._totals)
+        self._by_total = sorted((-cents, name) for name, cents in self._totals.items())
+
+    def update(self, name: str):
+        """Reflete no índice o estado atual da linha `name` (inserida, alterada ou removida)."""
+        item_obj = self._cart._items.get(name)
+        old_cents = self._totals.get(name)
+        if old_cents is not None:
+            key = (-old_cents, name)
+            del self._by_total[bisect.bisect_left(self._by_total, key)]
+        if item_obj is None:
+            if old_cents is not None:
+                del self._totals[name]
+                del self._names[bisect.bisect_left(self._names, name)]
+            return
+        if old_cents is None:
+            bisect.insort(self._names, name)
+        cents = self._totals[name] = item_obj.total_cents
+        bisect.insort(self._by_total, (-cents, name))
+
+
+class CartView:
+    """
+    View somente leitura sobre os itens de um carrinho. Reflete as mutações
+    feitas depois de sua criação; alterar o carrinho durante uma iteração
+    tem o mesmo efeito que alterar um dicionário durante a iteração. Para
+    percorrer um carrinho que muda entre as leituras, use page() com cursor.
+    """
+    def __init__(self, cart):
+        self._cart = cart
+
+    def _index(self) -> CartIndex:
+        cart = self._cart
+        if cart._index is None:
+            cart._index = CartIndex(cart)
+        return cart._index
+
+    def __len__(self) -> int:
+        return len(self._cart._items)
+
+    def __iter__(self):
+        """Itens na ordem de inserção."""
+        return iter(self._cart._items.values())
+
+    def __contains__(self, name) -> bool:
+        return name in self._cart._items
+
+    def get(self, name: str):
+        return self._cart._items.get(name)
+
+    def top_by_total(self, n: int) -> list:
+        """Os n itens de maior total de linha (empate: ordem alfabética)."""
+        items = self._cart._items
+        return [items[name] for _, name in self._index()._by_total[:max(n, 0)]]
+
+    def with_prefix(self, prefix: str):
+        """Itera, em ordem alfabética, os itens cujo nome começa com `prefix`."""
+        names = self._index()._names
+        items = self._cart._items
+        for i in itertools.count(bisect.bisect_left(names, prefix)):
+            if i >= len(names) or not names[i].startswith(prefix):
+                return
+            yield items[names[i]]
+
+    def page(self, limit: int, after: str | None = None) -> tuple[list, str | None]:
+        """
+        Até `limit` itens em ordem alfabética, começando depois do nome `after`.
+        Retorna (itens, cursor); o cursor é o nome do último item da página, a
+        ser passado como `after` na próxima chamada, ou None se não houver mais.
+        """
+        if limit <= 0:
+            raise ValueError("O limite da página deve ser positivo.")
+        names = self._index()._names
+        start = 0 if after is None else bisect.bisect_right(names, after)
+        page_names = names[start:start + limit]
+        items = self._cart._items
+        cursor = page_names[-1] if page_names and start + limit < len(names) else None
+        return [items[name] for name in page_names], cursor
+
+
+class ConcurrentCartView(CartView):
+    """
+    View de um ConcurrentCart. Iteração, len() e get() leem o snapshot
+    publicado, cujos itens nunca são alterados (os escritores clonam antes).
+    As consultas ordenadas leem o índice sob o lock de escrita, onde os
+    escritores o atualizam, e with_prefix() devolve os itens já coletados.
+    """
+    def _published(self) -> dict:
+        return self._cart._snapshot[0]
+
+    def __len__(self) -> int:
+        return len(self._published())
+
+    def __iter__(self):
+        return iter(self._published().values())
+
+    def __contains__(self, name) -> bool:
+        return name in self._published()
+
+    def get(self, name: str):
+        return self._published().get(name)
+
+    def top_by_total(self, n: int) -> list:
+        with self._cart._write_lock:
+            return super().top_by_total(n)
+
+    def with_prefix(self, prefix: str):
+        with self._cart._write_lock:
+            items = list(super().with_prefix(prefix))
+        return iter(items)
+
+    def page(self, limit: int, after: str | None = None) -> tuple[list, str | None]:
+        with self._cart._write_lock:
+            return super().page(limit, after)
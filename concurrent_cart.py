@@ -0,0 +1,130 @@
+# concurrent_cart.py
+import threading
+
+from item import Item
+from shopping_cart import Cart
+
+def _clone(item_obj: Item) -> Item:
+    return Item._from_units(item_obj._name, item_obj._quantity, item_obj._price_units, item_obj._price_scale)
+
+
+def _line_names(lines, default_to_name: bool) -> set:
+    """Nomes referenciados por linhas no formato aceito por add_items/remove_items."""
+    names = set()
+    for line in lines:
+        try:
+            if isinstance(line, dict):
+                names.add(line.get("name"))
+            elif isinstance(line, str) and default_to_name:
+                names.add(line)
+            else:
+                names.add(line[0])
+        except (TypeError, IndexError, KeyError):
+            pass # Linha inválida ou nome não hashable: rejeitados pelo próprio Cart
+    return names
+
+
+class ConcurrentCart(Cart):
+    """
+    Cart seguro para edição a partir de várias threads, com cópia na escrita.
+
+    Escritores são serializados por um lock e, em vez de alterar o dicionário de
+    itens publicado, trabalham sobre uma cópia (clonando os itens que vão mudar).
+    Ao final, publicam um snapshot imutável (itens, total). get_total() e
+    list_items() leem apenas o snapshot publicado e nunca esperam pelo lock.
+
+    A consulta ao coupon_service em apply_coupon acontece fora do lock.
+    """
+    def __init__(self, coupon_service=None, promotion_engine=None):
+        super().__init__(coupon_service=coupon_service, promotion_engine=promotion_engine)
+        self._write_lock = threading.Lock()
+        self._snapshot = (self._items, super().get_total())
+
+    def _copy_for_write(self, names=()):
+        """Troca self._items por uma cópia, clonando os itens que serão alterados."""
+        items = dict(self._items)
+        for name in names:
+            item_obj = items.get(name)
+            if item_obj is not None:
+                items[name] = _clone(item_obj)
+        self._items = items
+
+    def _publish(self):
+        self._snapshot = (self._items, super().get_total())
+
+    def add_item(self, name, quantity, unit_price):
+        with self._write_lock:
+            self._copy_for_write((name,))
+            try:
+                super().add_item(name, quantity, unit_price)
+            finally:
+                self._publish()
+
+    def remove_item(self, name, quantity_to_remove=None):
+        with self._write_lock:
+            self._copy_for_write((name,))
+            try:
+                super().remove_item(name, quantity_to_remove)
+            finally:
+                self._publish()
+
+    def add_items(self, lines):
+        lines = list(lines)
+        with self._write_lock:
+            self._copy_for_write(_line_names(lines, default_to_name=False))
+            try:
+                super().add_items(lines)
+            finally:
+                self._publish()
+
+    def remove_items(self, lines):
+        lines = list(lines)
+        with self._write_lock:
+            self._copy_for_write(_line_names(lines, default_to_name=True))
+            try:
+                super().remove_items(lines)
+            finally:
+                self._publish()
+
+    def apply_coupon(self, coupon_code: str) -> bool:
+        with self._write_lock:
+            if self._activate_promotion_code(coupon_code):
+                self._publish()
+                return True
+        if not self.coupon_service:
+            return False
+
+        coupon_data = self.coupon_service.validate_coupon(coupon_code)
+        with self._write_lock:
+            applied = self._set_coupon(coupon_data)
+            self._publish()
+        return applied
+
+    def clear_cart(self):
+        with self._write_lock:
+            super().clear_cart()
+            self._publish()
+
+    def _restore(self, items, coupon):
+        with self._write_lock:
+            super()._restore(items, coupon)
+            self._publish()
+
+    def changes_since(self, version):
+        with self._write_lock: # O log de deltas só é consistente entre escritas
+            return super().changes_since(version)
+
+    def dump(self, fmt: str = "binary") -> bytes | str:
+        with self._write_lock: # Itens e cupom de um mesmo estado publicado
+            return super().dump(fmt)
+
+    def view(self):
+        """View segura para leitura concorrente (cart_views.ConcurrentCartView)."""
+        from cart_views import ConcurrentCartView
+        return ConcurrentCartView(self)
+
+    def get_total(self):
+        return self._snapshot[1]
+
+    def list_items(self) -> list[dict]:
+        return [item_obj.to_dict() for item_obj in self._snapshot[0].values()]
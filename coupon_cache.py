@@ -0,0 +1,104 @@
+# coupon_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+class _InFlight:
+    """Consulta em andamento ao serviço, compartilhada pelas threads que pediram o mesmo código."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CachedCouponService:
+    """
+    Cache LRU com TTL na frente de qualquer serviço com validate_coupon(coupon_code).
+
+    - Tamanho limitado (maxsize): o código usado há mais tempo é descartado primeiro.
+    - TTL por entrada; cupons desconhecidos (None) também são cacheados, com
+      negative_ttl próprio (por padrão igual ao ttl).
+    - Falhas simultâneas para o mesmo código resultam em uma única consulta ao
+      serviço (single-flight); as demais threads aguardam e reutilizam o resultado.
+    - Exceções do serviço não são cacheadas e são repassadas a todas as threads em espera.
+    """
+    def __init__(self, coupon_service, maxsize: int = 1024, ttl: float = 60.0,
+                 negative_ttl: float | None = None, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("O tamanho máximo do cache deve ser positivo.")
+        self.coupon_service = coupon_service
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # {código: (expira_em, dados_do_cupom)}
+        self._in_flight = {}  # {código: _InFlight}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def validate_coupon(self, coupon_code: str) -> dict | None:
+        """Mesmo contrato de CouponService.validate_coupon, servido do cache quando possível."""
+        with self._lock:
+            entry = self._entries.get(coupon_code)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(coupon_code)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[coupon_code] # Expirado
+
+            self.misses += 1
+            call = self._in_flight.get(coupon_code)
+            leader = call is None
+            if leader:
+                call = self._in_flight[coupon_code] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self.coupon_service.validate_coupon(coupon_code)
+        except Exception as e:
+            call.error = e
+            raise
+        else:
+            self._store(coupon_code, call.result)
+            return call.result
+        finally:
+            with self._lock:
+                del self._in_flight[coupon_code]
+            call.done.set()
+
+    def _store(self, coupon_code: str, coupon_data: dict | None):
+        ttl = self.ttl if coupon_data is not None else self.negative_ttl
+        with self._lock:
+            self._entries[coupon_code] = (self._clock() + ttl, coupon_data)
+            self._entries.move_to_end(coupon_code)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, coupon_code: str | None = None):
+        """Remove um código do cache, ou todos se nenhum for informado."""
+        with self._lock:
+            if coupon_code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(coupon_code, None)
+
+    def stats(self) -> dict:
+        """Contadores de acertos, falhas e descartes por LRU, além do tamanho atual."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
@@ -1,4 +1,5 @@
 # coupon_service.py
+import time
 
 class CouponService:
     """
@@ -30,4 +31,20 @@ class CouponService:
         if coupon_code not in self.valid_coupons and coupon_code != "INVALIDO":
              # Simula um cupom que o serviço desconhece
             return None
-        return self.valid_coupons.get(coupon_code)
\ No newline at end of file
+        return self.valid_coupons.get(coupon_code)
+
+
+class LatencyCouponService(CouponService):
+    """
+    CouponService com latência artificial, simulando um backend remoto.
+    Usado em benchmarks e testes de cache; conta quantas consultas chegaram ao "backend".
+    """
+    def __init__(self, latency: float = 0.01):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    def validate_coupon(self, coupon_code: str) -> dict | None:
+        self.calls += 1
+        time.sleep(self.latency)
+        return super().validate_coupon(coupon_code)
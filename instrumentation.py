@@ -0,0 +1,227 @@
+# instrumentation.py
+"""
+Instrumentação opcional do carrinho e do serviço de cupons.
+
+Nada é medido até que instrument_cart() seja chamado: os métodos só são
+envolvidos na instância instrumentada, então carrinhos comuns não pagam nenhum
+custo. uninstrument_cart() remove os envoltórios; Instrumentation.enabled = False
+desliga a coleta em tempo de execução (resta apenas uma chamada extra).
+
+Exemplo:
+    metrics = Instrumentation(sink=PrometheusFileSink("/var/lib/metrics/cart.prom"))
+    instrument_cart(cart, metrics)   # também envolve cart.coupon_service
+    ...
+    metrics.flush()
+"""
+import bisect
+import functools
+import inspect
+import logging
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+CART_OPERATIONS = (
+    "add_item", "remove_item", "add_items", "remove_items",
+    "apply_coupon", "get_total", "list_items", "clear_cart",
+)
+
+
+class Histogram:
+    """Histograma de latências com limites fixos (em segundos)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Último = acima do maior limite
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Pares (limite, observações <= limite), no formato dos buckets do Prometheus."""
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class Instrumentation:
+    """Contadores de chamadas e erros e histogramas de latência por operação."""
+
+    def __init__(self, sink=None, buckets=DEFAULT_BUCKETS):
+        self.sink = sink
+        self.buckets = buckets
+        self.enabled = True
+        self.calls = {}
+        self.errors = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float, error: bool = False):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            if error:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+            histogram = self.histograms.get(operation)
+            if histogram is None:
+                histogram = self.histograms[operation] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timed(self, operation: str, func):
+        """Envolve `func` (síncrona ou corrotina) medindo latência e erros como `operation`."""
+        clock = time.perf_counter
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                started = clock()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    self.observe(operation, clock() - started, error=True)
+                    raise
+                self.observe(operation, clock() - started)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            started = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                self.observe(operation, clock() - started, error=True)
+                raise
+            self.observe(operation, clock() - started)
+            return result
+        return wrapper
+
+    def snapshot(self) -> dict:
+        """Cópia dos dados coletados: {operação: {"calls", "errors", "sum", "buckets"}}."""
+        with self._lock:
+            return {
+                operation: {
+                    "calls": self.calls[operation],
+                    "errors": self.errors.get(operation, 0),
+                    "sum": histogram.sum,
+                    "buckets": histogram.cumulative(),
+                }
+                for operation, histogram in self.histograms.items()
+            }
+
+    def flush(self):
+        """Envia o snapshot atual ao sink configurado."""
+        if self.sink is not None:
+            self.sink.write(self.snapshot())
+
+
+class InMemorySink:
+    """Guarda os snapshots recebidos (útil em testes)."""
+
+    def __init__(self):
+        self.snapshots = []
+
+    def write(self, snapshot: dict):
+        self.snapshots.append(snapshot)
+
+
+class LoggingSink:
+    """Registra um resumo por operação no logger informado."""
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("cart.instrumentation")
+        self.level = level
+
+    def write(self, snapshot: dict):
+        for operation, data in sorted(snapshot.items()):
+            mean = data["sum"] / data["calls"] if data["calls"] else 0.0
+            self.logger.log(self.level, "%s calls=%d errors=%d mean=%.6fs",
+                            operation, data["calls"], data["errors"], mean)
+
+
+class PrometheusFileSink:
+    """
+    Grava o snapshot no formato texto do Prometheus (ex.: para o textfile
+    collector do node_exporter). O arquivo é substituído de forma atômica.
+    """
+    def __init__(self, path: str, metric_prefix: str = "cart"):
+        self.path = path
+        self.metric_prefix = metric_prefix
+
+    def render(self, snapshot: dict) -> str:
+        seconds = f"{self.metric_prefix}_operation_seconds"
+        errors = f"{self.metric_prefix}_operation_errors_total"
+        lines = [
+            f"# HELP {seconds} Latência das operações instrumentadas.",
+            f"# TYPE {seconds} histogram",
+        ]
+        for operation, data in sorted(snapshot.items()):
+            label = f'operation="{operation}"'
+            for bound, count in data["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{seconds}_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f"{seconds}_sum{{{label}}} {data['sum']!r}")
+            lines.append(f"{seconds}_count{{{label}}} {data['calls']}")
+        lines.append(f"# HELP {errors} Chamadas que terminaram em exceção.")
+        lines.append(f"# TYPE {errors} counter")
+        for operation, data in sorted(snapshot.items()):
+            lines.append(f'{errors}{{operation="{operation}"}} {data["errors"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, snapshot: dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cart-metrics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render(snapshot))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class InstrumentedCouponService:
+    """Envolve um serviço de cupons medindo a latência e os erros de validate_coupon."""
+
+    def __init__(self, coupon_service, instrumentation: Instrumentation):
+        self.coupon_service = coupon_service
+        self.validate_coupon = instrumentation.timed(
+            "coupon_service.validate_coupon", coupon_service.validate_coupon
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.coupon_service, name)
+
+
+def instrument_cart(cart, instrumentation: Instrumentation, operations=CART_OPERATIONS):
+    """
+    Instrumenta os métodos `operations` desta instância (como "cart.<método>") e
+    envolve o coupon_service, se houver. Retorna o próprio carrinho.
+    """
+    for name in operations:
+        method = getattr(cart, name, None)
+        if method is not None:
+            setattr(cart, name, instrumentation.timed(f"cart.{name}", method))
+    if cart.coupon_service is not None and not isinstance(cart.coupon_service, InstrumentedCouponService):
+        cart.coupon_service = InstrumentedCouponService(cart.coupon_service, instrumentation)
+    return cart
+
+
+def uninstrument_cart(cart, operations=CART_OPERATIONS):
+    """Remove os envoltórios de instrument_cart, voltando aos métodos originais."""
+    for name in operations:
+        cart.__dict__.pop(name, None)
+    if isinstance(cart.coupon_service, InstrumentedCouponService):
+        cart.coupon_service = cart.coupon_service.coupon_service
+    return cart
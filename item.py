@@ -1,23 +1,93 @@
 # item.py
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
+
+_ZERO = Decimal("0")
+_MAX_FAST_DIGITS = 30  # Textos maiores seguem pelo Decimal (sem limite de dígitos do int())
+_CENT_MULTIPLIERS = (100, 10, 1)  # 10 ** (2 - escala) para as escalas 0, 1 e 2
+
+
+def _units_to_decimal(units: int, scale: int) -> Decimal:
+    """Decimal exato de unidades / 10**escala (scaleb arredondaria a 28 dígitos)."""
+    return Decimal(f"{units}e-{scale}")
+
+
+def _price_to_units(value: str | float | Decimal) -> tuple[int, int]:
+    """
+    Converte um preço para (unidades, escala) inteiras, onde preço = unidades / 10**escala.
+
+    A escala preserva as casas decimais informadas ("0.50" -> (50, 2)), então preços
+    em centavos ficam em centavos e preços com frações de centavo não perdem precisão.
+
+    Textos simples ("123" ou "123.45", só dígitos ASCII) e inteiros são convertidos
+    sem passar por Decimal; o resto (sinal, expoente, espaços, float) usa Decimal,
+    com o mesmo resultado.
+    """
+    kind = type(value)
+    if kind is str:
+        whole, dot, fraction = value.partition(".")
+        if (len(value) <= _MAX_FAST_DIGITS and whole.isdigit() and whole.isascii()
+                and (not dot or (fraction.isdigit() and fraction.isascii()))):
+            return int(whole + fraction), len(fraction)
+        price = Decimal(value)
+    elif kind is int: # bool não entra aqui: Decimal(str(True)) é inválido
+        if value < 0:
+            raise ValueError("O preço unitário não pode ser negativo.")
+        return value, 0
+    elif kind is Decimal:
+        price = value
+    else:
+        price = Decimal(str(value))
+    if price < _ZERO:
+        raise ValueError("O preço unitário não pode ser negativo.")
+    if not price.is_finite():
+        raise ValueError("O preço unitário deve ser um número finito.")
+    _, digits, exponent = price.as_tuple()
+    if exponent >= 0:
+        return int(price), 0
+    return int("".join(map(str, digits))), -exponent # Sem scaleb: não arredonda no contexto
+
+
+def _line_total_cents(quantity: int, units: int, scale: int) -> int:
+    """Total da linha em centavos, arredondado com ROUND_HALF_UP (valores não negativos)."""
+    raw = quantity * units
+    if scale <= 2:
+        return raw * _CENT_MULTIPLIERS[scale]
+    divisor = 10 ** (scale - 2)
+    cents, remainder = divmod(raw, divisor)
+    if remainder * 2 >= divisor:
+        cents += 1
+    return cents
+
 
 class Item:
+    # Sem __dict__ por instância: o preço fica em inteiros e o Decimal só é
+    # montado na fronteira da API (unit_price, total_price, to_dict()).
+    __slots__ = ("_name", "_quantity", "_price_units", "_price_scale")
+
     def __init__(self, name: str, quantity: int, unit_price: str | float | Decimal):
         if not isinstance(name, str) or not name.strip():
             raise ValueError("O nome do item não pode ser vazio.")
         if not isinstance(quantity, int) or quantity <= 0:
             raise ValueError("A quantidade deve ser um inteiro positivo.")
-        
+
         try:
-            self._unit_price = Decimal(str(unit_price))
-            if self._unit_price < Decimal("0"):
-                raise ValueError("O preço unitário não pode ser negativo.")
+            self._price_units, self._price_scale = _price_to_units(unit_price)
         except Exception as e:
             raise ValueError(f"Preço unitário inválido: {e}")
 
         self._name = name
         self._quantity = quantity
 
+    @classmethod
+    def _from_units(cls, name: str, quantity: int, units: int, scale: int) -> "Item":
+        """Cria um item a partir de valores já validados, sem repetir a validação."""
+        item = cls.__new__(cls)
+        item._name = name
+        item._quantity = quantity
+        item._price_units = units
+        item._price_scale = scale
+        return item
+
     @property
     def name(self) -> str:
         return self._name
@@ -34,21 +104,23 @@ class Item:
 
     @property
     def unit_price(self) -> Decimal:
-        return self._unit_price
+        return _units_to_decimal(self._price_units, self._price_scale)
 
     @unit_price.setter
     def unit_price(self, value: str | float | Decimal):
         try:
-            new_price = Decimal(str(value))
-            if new_price < Decimal("0"):
-                raise ValueError("O preço unitário não pode ser negativo.")
-            self._unit_price = new_price
+            self._price_units, self._price_scale = _price_to_units(value)
         except Exception as e:
             raise ValueError(f"Preço unitário inválido ao atualizar: {e}")
-            
+
+    @property
+    def total_cents(self) -> int:
+        """Total da linha em centavos inteiros (quantidade x preço, ROUND_HALF_UP)."""
+        return _line_total_cents(self._quantity, self._price_units, self._price_scale)
+
     @property
     def total_price(self) -> Decimal:
-        return (self.quantity * self.unit_price).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return _units_to_decimal(self.total_cents, 2)
 
     def __repr__(self) -> str:
         return f"Item(name='{self.name}', quantity={self.quantity}, unit_price='{self.unit_price}')"
@@ -60,4 +132,4 @@ class Item:
             "quantity": self.quantity,
             "unit_price": self.unit_price,
             "total_price": self.total_price
-        }
\ No newline at end of file
+        }
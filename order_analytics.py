@@ -0,0 +1,294 @@
+# order_analytics.py
+"""
+Análise em streaming do histórico de carrinhos exportados.
+
+Cada registro é uma linha de carrinho finalizado, em JSON lines ou CSV com os
+campos cart_id, name, quantity, unit_price e, opcionalmente, coupon_type e
+coupon_value (repetidos em todas as linhas do carrinho ou só na primeira).
+As linhas de um mesmo carrinho devem estar contíguas, como na exportação de
+list_items() carrinho a carrinho.
+
+A entrada é lida em blocos de chunk_size registros por geradores; cada bloco é
+validado como Cart.add_items, precificado por batch_pricing (mesmas regras de
+Cart.get_total() e Item.total_price) e reduzido a um OrderAnalytics. Como um
+carrinho pode começar no fim de um bloco e terminar no seguinte, o primeiro e
+o último carrinho de cada bloco voltam sem precificar e são juntados na ordem
+dos blocos. A memória fica limitada ao bloco atual (mais os blocos em voo, com
+processes > 1) e aos agregados.
+
+Exemplo:
+    with open("historico.jsonl", encoding="utf-8") as f:
+        analytics = analyze_json_lines(f, processes=8)
+    analytics.top_items(10)
+    analytics.coupon_uplift()
+"""
+import collections
+import csv
+import itertools
+import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import Decimal
+
+from batch_pricing import price_columns
+from cart_import import _to_quantity
+from item import _units_to_decimal
+from shopping_cart import _validate_line
+
+DEFAULT_CHUNK_SIZE = 50_000
+_CENT = Decimal("0.01")
+_UPLIFT_QUANTUM = Decimal("0.0001")
+
+_JSON_DECODER = json.JSONDecoder(parse_float=str) # Preserva as casas decimais do preço
+
+
+class OrderAnalytics:
+    """Agregados em centavos; combináveis com merge() (ex.: resultados de vários blocos)."""
+
+    def __init__(self):
+        self.carts = 0
+        self.lines = 0
+        self.subtotal_cents = 0
+        self.discount_cents = 0
+        self.total_cents = 0
+        self.revenue_by_item = collections.Counter()  # {nome: soma dos totais de linha}
+        self.units_by_item = collections.Counter()
+        self.basket_sizes = collections.Counter()     # {unidades no carrinho: carrinhos}
+        # [carrinhos, subtotal] com e sem cupom, para medir o efeito do cupom no ticket
+        self.with_coupon = [0, 0]
+        self.without_coupon = [0, 0]
+
+    def merge(self, other: "OrderAnalytics") -> "OrderAnalytics":
+        self.carts += other.carts
+        self.lines += other.lines
+        self.subtotal_cents += other.subtotal_cents
+        self.discount_cents += other.discount_cents
+        self.total_cents += other.total_cents
+        self.revenue_by_item.update(other.revenue_by_item)
+        self.units_by_item.update(other.units_by_item)
+        self.basket_sizes.update(other.basket_sizes)
+        for mine, theirs in ((self.with_coupon, other.with_coupon), (self.without_coupon, other.without_coupon)):
+            mine[0] += theirs[0]
+            mine[1] += theirs[1]
+        return self
+
+    def top_items(self, n: int) -> list[tuple[str, Decimal]]:
+        """Os n itens de maior receita bruta (antes do cupom), como (nome, Decimal)."""
+        return [(name, _units_to_decimal(cents, 2)) for name, cents in self.revenue_by_item.most_common(n)]
+
+    def coupon_uplift(self) -> dict:
+        """
+        Ticket médio (subtotal) dos carrinhos com e sem cupom e o uplift relativo
+        (com / sem - 1). Valores ausentes quando não há carrinhos no grupo.
+        """
+        def average(group):
+            carts, subtotal = group
+            return (Decimal(subtotal) / carts / 100).quantize(_CENT) if carts else None
+
+        with_coupon, without_coupon = average(self.with_coupon), average(self.without_coupon)
+        uplift = None
+        if with_coupon is not None and without_coupon:
+            uplift = (with_coupon / without_coupon - 1).quantize(_UPLIFT_QUANTUM)
+        return {
+            "carts_with_coupon": self.with_coupon[0],
+            "carts_without_coupon": self.without_coupon[0],
+            "average_with_coupon": with_coupon,
+            "average_without_coupon": without_coupon,
+            "discount": _units_to_decimal(self.discount_cents, 2),
+            "uplift": uplift,
+        }
+
+
+def cart_records(cart_id, cart):
+    """Registros de exportação de um carrinho (list_items() mais cart_id e cupom)."""
+    coupon = cart._applied_coupon or {}
+    for line in cart.list_items():
+        yield {
+            "cart_id": cart_id,
+            "name": line["name"],
+            "quantity": line["quantity"],
+            "unit_price": str(line["unit_price"]),
+            "coupon_type": coupon.get("type"),
+            "coupon_value": None if not coupon else str(coupon.get("value")),
+        }
+
+
+class _CartGroup:
+    """Linhas de um carrinho já validadas e mescladas como em Cart.add_items."""
+
+    __slots__ = ("cart_id", "coupon", "lines")
+
+    def __init__(self, cart_id, coupon):
+        self.cart_id = cart_id
+        self.coupon = coupon
+        self.lines = {}  # {nome: [quantidade, unidades, escala]}
+
+    def add(self, name, quantity, units, scale):
+        pending = self.lines.get(name)
+        if pending is None:
+            self.lines[name] = [quantity, units, scale]
+        else:
+            pending[0] += quantity
+            pending[1], pending[2] = units, scale
+
+    def extend(self, other: "_CartGroup"):
+        if self.coupon is None:
+            self.coupon = other.coupon
+        for name, (quantity, units, scale) in other.lines.items():
+            self.add(name, quantity, units, scale)
+
+
+def _coupon_from_record(coupon_type, coupon_value):
+    """Cupom no formato de Cart._applied_coupon, descartado nos casos em que Cart._set_coupon o rejeita."""
+    if not coupon_type:
+        return None
+    try:
+        value = Decimal(str(coupon_value if coupon_value not in (None, "") else 0))
+        if value < 0:
+            return None
+    except Exception:
+        return None
+    return {"type": coupon_type, "value": value}
+
+
+def _group_records(records) -> list[_CartGroup]:
+    """Agrupa registros contíguos por cart_id, validando cada linha."""
+    groups, current = [], None
+    parsed_prices = {}  # Preços repetidos no bloco são convertidos uma única vez
+    for number, record in enumerate(records, 1):
+        cart_id = record.get("cart_id")
+        if current is None or cart_id != current.cart_id:
+            current = _CartGroup(cart_id, None)
+            groups.append(current)
+        if current.coupon is None:
+            current.coupon = _coupon_from_record(record.get("coupon_type"), record.get("coupon_value"))
+        name, quantity, unit_price = record.get("name"), record.get("quantity"), record.get("unit_price")
+        price = parsed_prices.get(unit_price) if isinstance(unit_price, str) else None
+        try:
+            if price is None:
+                price = _validate_line(name, quantity, unit_price)
+                if isinstance(unit_price, str):
+                    parsed_prices[unit_price] = price
+            elif not isinstance(quantity, int) or quantity <= 0 or not isinstance(name, str) or not name.strip():
+                _validate_line(name, quantity, unit_price) # Levanta o erro com a mensagem padrão
+        except ValueError as e:
+            raise ValueError(f"Registro {number} do bloco (carrinho {cart_id!r}): {e}")
+        current.add(name, quantity, *price)
+    return groups
+
+
+def _price_groups(groups, use_numpy=None) -> OrderAnalytics:
+    analytics = OrderAnalytics()
+    if not groups:
+        return analytics
+    cart_ids, names, quantities, price_units, price_scales = [], [], [], [], []
+    for index, group in enumerate(groups):
+        for name, (quantity, units, scale) in group.lines.items():
+            cart_ids.append(index)
+            names.append(name)
+            quantities.append(quantity)
+            price_units.append(units)
+            price_scales.append(scale)
+    result = price_columns(cart_ids, quantities, price_units, price_scales,
+                           [group.coupon for group in groups], use_numpy=use_numpy)
+
+    line_totals = [int(cents) for cents in result.line_totals]
+    revenue, units_sold = analytics.revenue_by_item, analytics.units_by_item
+    for name, quantity, cents in zip(names, quantities, line_totals):
+        revenue[name] += cents
+        units_sold[name] += quantity
+
+    for group, subtotal, discount, total in zip(groups, result.subtotals, result.discounts, result.totals):
+        subtotal, discount, total = int(subtotal), int(discount), int(total)
+        analytics.subtotal_cents += subtotal
+        analytics.discount_cents += discount
+        analytics.total_cents += total
+        analytics.basket_sizes[sum(line[0] for line in group.lines.values())] += 1
+        bucket = analytics.with_coupon if group.coupon is not None else analytics.without_coupon
+        bucket[0] += 1
+        bucket[1] += subtotal
+    analytics.carts = len(groups)
+    analytics.lines = len(line_totals)
+    return analytics
+
+
+def _parse_json_records(raw_lines):
+    for raw_line in raw_lines:
+        raw_line = raw_line.strip()
+        if raw_line:
+            yield _JSON_DECODER.decode(raw_line)
+
+
+def _parse_csv_records(header, rows):
+    for row in rows:
+        record = dict(zip(header, row))
+        record["quantity"] = _to_quantity(record.get("quantity"))
+        yield record
+
+
+def _analyze_chunk(fmt: str, header, chunk, use_numpy=None):
+    """
+    Processa um bloco (linhas de texto JSON ou linhas CSV já separadas).
+    Retorna (agregados dos carrinhos internos, carrinhos das bordas sem precificar).
+    """
+    records = _parse_json_records(chunk) if fmt == "jsonl" else _parse_csv_records(header, chunk)
+    groups = _group_records(records)
+    edges = groups[:1] + groups[1:][-1:]
+    return _price_groups(groups[1:-1], use_numpy), edges
+
+
+def _chunked(iterable, chunk_size: int):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _analyze_chunks(fmt, header, chunks, processes, use_numpy) -> OrderAnalytics:
+    analytics = OrderAnalytics()
+    pending = None  # Último carrinho visto; pode continuar no próximo bloco
+
+    def consume(result):
+        nonlocal pending
+        partial, edges = result
+        analytics.merge(partial)
+        for group in edges:
+            if pending is not None and pending.cart_id == group.cart_id:
+                pending.extend(group)
+                continue
+            if pending is not None:
+                analytics.merge(_price_groups([pending], use_numpy))
+            pending = group
+
+    if processes is None or processes <= 1:
+        for chunk in chunks:
+            consume(_analyze_chunk(fmt, header, chunk, use_numpy))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            in_flight = collections.deque()  # Futures na ordem dos blocos
+            for chunk in chunks:
+                in_flight.append(executor.submit(_analyze_chunk, fmt, header, chunk, use_numpy))
+                if len(in_flight) >= 2 * processes: # Limita os blocos em memória
+                    wait([in_flight[0]], return_when=FIRST_COMPLETED)
+                    while in_flight and in_flight[0].done():
+                        consume(in_flight.popleft().result())
+            while in_flight:
+                consume(in_flight.popleft().result())
+
+    if pending is not None:
+        analytics.merge(_price_groups([pending], use_numpy))
+    return analytics
+
+
+def analyze_json_lines(stream, chunk_size: int = DEFAULT_CHUNK_SIZE, processes: int | None = None,
+                       use_numpy=None) -> OrderAnalytics:
+    """Analisa registros em JSON lines (um objeto por linha) lidos de `stream`."""
+    return _analyze_chunks("jsonl", None, _chunked(stream, chunk_size), processes, use_numpy)
+
+
+def analyze_csv(stream, chunk_size: int = DEFAULT_CHUNK_SIZE, processes: int | None = None,
+                use_numpy=None) -> OrderAnalytics:
+    """Analisa registros em CSV com cabeçalho (abra o arquivo com newline="")."""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return OrderAnalytics()
+    return _analyze_chunks("csv", header, _chunked(reader, chunk_size), processes, use_numpy)
@@ -0,0 +1,174 @@
+# price_catalog.py
+"""
+Tabela de preços do catálogo em arquivo mapeado em memória.
+
+Formato (little-endian):
+    cabeçalho: b"CPRC", versão (uint16), 2 bytes de preenchimento,
+               geração (uint64), quantidade de SKUs (uint64)
+    corpo:     um int64 por SKU com o preço em centavos (-1 = SKU sem preço)
+
+O SKU é o índice na tabela (inteiro de 0 a quantidade - 1). Como o arquivo é
+aberto com mmap somente leitura, todos os processos que usam a mesma tabela
+compartilham as páginas do cache do sistema operacional, sem cópias por processo.
+
+Atualização a quente: write_price_table() grava um arquivo novo ao lado e o
+coloca no lugar com os.replace() (atômico). PriceTable.refresh() percebe a troca
+pelo os.stat(), feito no máximo a cada refresh_interval segundos, e passa a
+mapear o arquivo novo; leitores do mapeamento antigo continuam válidos até
+soltarem a referência. Cart.get_total() chama refresh() e reprecifica as linhas
+de SKU só quando a geração muda.
+
+close() (ou o bloco with) solta o mapeamento atual quando a tabela não é mais usada.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+FORMAT_VERSION = 1
+MISSING = -1
+
+_MAGIC = b"CPRC"
+_HEADER = struct.Struct("<4sHxxQQ")
+_PRICE = struct.Struct("<q")
+
+
+def _read_header(data) -> tuple[int, int]:
+    if len(data) < _HEADER.size:
+        raise ValueError("Tabela de preços truncada.")
+    magic, version, generation, count = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise ValueError("Arquivo não é uma tabela de preços.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versão de tabela de preços não suportada: {version}")
+    if len(data) < _HEADER.size + count * _PRICE.size:
+        raise ValueError("Tabela de preços truncada.")
+    return generation, count
+
+
+def _current_generation(path: str) -> int:
+    """Geração do arquivo publicado em `path`, ou 0 se não houver tabela válida."""
+    try:
+        with open(path, "rb") as f:
+            magic, version, generation, _ = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return 0
+    return generation if magic == _MAGIC and version == FORMAT_VERSION else 0
+
+
+def write_price_table(path: str, prices, generation: int | None = None) -> int:
+    """
+    Grava a tabela (lista de centavos indexada pelo SKU, com None ou -1 para SKUs
+    sem preço, ou dicionário {sku: centavos}) e a publica atomicamente em `path`.
+    Sem `generation`, usa a geração do arquivo atual + 1. Retorna a geração gravada.
+    """
+    if isinstance(prices, dict):
+        for sku in prices:
+            if not isinstance(sku, int) or isinstance(sku, bool) or sku < 0:
+                raise ValueError(f"SKU inválido: {sku!r}")
+        table = [MISSING] * (max(prices) + 1 if prices else 0)
+        for sku, cents in prices.items():
+            table[sku] = cents
+    else:
+        table = [MISSING if cents is None else cents for cents in prices]
+    for sku, cents in enumerate(table):
+        if not isinstance(cents, int) or isinstance(cents, bool) or cents < MISSING:
+            raise ValueError(f"Preço inválido para o SKU {sku}: {cents!r}")
+
+    if generation is None:
+        generation = _current_generation(path) + 1
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".price-table-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, generation, len(table)))
+            f.write(struct.pack(f"<{len(table)}q", *table))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return generation
+
+
+class PriceTable:
+    """
+    Leitura da tabela publicada em `path`, compartilhada via mmap entre processos.
+    refresh() consulta o arquivo no máximo a cada `refresh_interval` segundos
+    (0 = sempre), para não pagar um os.stat() a cada Cart.get_total().
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 1.0):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._next_check = 0.0  # time.monotonic() a partir do qual refresh() volta ao arquivo
+        self._stat_key = None
+        self._table = (None, 0)  # (mmap, quantidade de SKUs), trocados juntos
+        self.generation = 0
+        self._closed = False
+        self.refresh()
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Remapeia o arquivo se ele foi substituído. Retorna a geração atual.
+        Sem `force`, dentro de refresh_interval desde a última consulta só
+        retorna a geração já conhecida.
+        """
+        if self._closed:
+            raise ValueError("A tabela de preços já foi fechada.")
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return self.generation
+        self._next_check = now + self.refresh_interval
+        st = os.stat(self.path)
+        stat_key = (st.st_ino, st.st_dev, st.st_mtime_ns, st.st_size)
+        if stat_key == self._stat_key:
+            return self.generation
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        generation, count = _read_header(mapped)
+        # O mapeamento antigo não é fechado aqui: leituras em andamento em outras
+        # threads continuam válidas e ele é liberado quando não houver referências.
+        self._table = (mapped, count)
+        self.generation, self._stat_key = generation, stat_key
+        return generation
+
+    def __len__(self) -> int:
+        return self._table[1]
+
+    def price_cents(self, sku: int) -> int:
+        """Preço do SKU em centavos. KeyError se o SKU não existir ou não tiver preço."""
+        mapped, count = self._table
+        if not isinstance(sku, int) or isinstance(sku, bool) or not 0 <= sku < count:
+            raise KeyError(sku)
+        (cents,) = _PRICE.unpack_from(mapped, _HEADER.size + sku * _PRICE.size)
+        if cents == MISSING:
+            raise KeyError(sku)
+        return cents
+
+    def get(self, sku: int, default=None):
+        try:
+            return self.price_cents(sku)
+        except KeyError:
+            return default
+
+    def close(self):
+        """
+        Fecha o mapeamento atual. Depois disso as consultas levantam KeyError e
+        refresh() levanta ValueError; leituras em andamento não devem existir.
+        """
+        mapped, _ = self._table
+        self._closed = True
+        self._table = (None, 0)
+        self._stat_key = None
+        if mapped is not None:
+            mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,157 @@
+# promotions.py
+"""
+Motor de promoções baseado em regras, compiladas e indexadas uma única vez.
+
+Regras por item (ItemPercentOff, BuyXGetY) ficam indexadas pelo nome do item e
+só são avaliadas para as linhas presentes no carrinho. Regras por valor gasto
+(SpendThreshold) ficam ordenadas pelo mínimo exigido e uma busca binária
+seleciona apenas as que o subtotal atinge. Regras com `code` só valem depois
+que o código é aplicado no carrinho (Cart.apply_coupon).
+
+Empilhamento: todas as regras aplicáveis com stackable=True somam; entre as
+aplicáveis com stackable=False vale só a de maior desconto (por linha, para
+regras de item; no pedido, para regras por valor gasto). Descontos por item
+são calculados primeiro e as regras por valor gasto usam o subtotal já
+descontado. Cada desconto é arredondado para centavos com ROUND_HALF_UP.
+"""
+import bisect
+
+from item import _line_total_cents, _price_to_units
+
+def _to_units(value, field: str) -> tuple[int, int]:
+    try:
+        return _price_to_units(value)
+    except Exception as e:
+        raise ValueError(f"Valor inválido para {field}: {e}")
+
+
+def _percent_of(base_cents: int, percent: tuple[int, int]) -> int:
+    """base_cents * percentual / 100, arredondado com ROUND_HALF_UP."""
+    units, scale = percent
+    denominator = 100 * 10 ** scale
+    return (2 * base_cents * units + denominator) // (2 * denominator)
+
+
+class Rule:
+    """Base das regras: código opcional que ativa a regra e se ela empilha com outras."""
+
+    def __init__(self, code: str | None = None, stackable: bool = True):
+        self.code = code
+        self.stackable = stackable
+
+
+class ItemPercentOff(Rule):
+    """Percentual de desconto sobre o total da linha de um item."""
+
+    def __init__(self, item_name: str, percent, code=None, stackable=True):
+        super().__init__(code, stackable)
+        self.item_name = item_name
+        self.percent = _to_units(percent, "percentual")
+        if self.percent[0] > 100 * 10 ** self.percent[1]:
+            raise ValueError("O percentual de desconto não pode passar de 100.")
+
+    def line_discount_cents(self, item_obj) -> int:
+        return _percent_of(item_obj.total_cents, self.percent)
+
+
+class BuyXGetY(Rule):
+    """Leve buy + get unidades do item e pague apenas buy."""
+
+    def __init__(self, item_name: str, buy: int, get: int, code=None, stackable=True):
+        super().__init__(code, stackable)
+        if not isinstance(buy, int) or not isinstance(get, int) or buy <= 0 or get <= 0:
+            raise ValueError("As quantidades da promoção devem ser inteiros positivos.")
+        self.item_name = item_name
+        self.buy = buy
+        self.get = get
+
+    def line_discount_cents(self, item_obj) -> int:
+        free_units = (item_obj.quantity // (self.buy + self.get)) * self.get
+        return _line_total_cents(free_units, item_obj._price_units, item_obj._price_scale)
+
+
+class SpendThreshold(Rule):
+    """Desconto fixo (amount) ou percentual (percent) quando o subtotal atinge min_subtotal."""
+
+    def __init__(self, min_subtotal, amount=None, percent=None, code=None, stackable=True):
+        super().__init__(code, stackable)
+        if (amount is None) == (percent is None):
+            raise ValueError("Informe amount ou percent (apenas um deles).")
+        self.min_cents = _line_total_cents(1, *_to_units(min_subtotal, "subtotal mínimo"))
+        self.amount_cents = None if amount is None else _line_total_cents(1, *_to_units(amount, "valor"))
+        self.percent = None if percent is None else _to_units(percent, "percentual")
+
+    def order_discount_cents(self, subtotal_cents: int) -> int:
+        if self.amount_cents is not None:
+            return self.amount_cents
+        return _percent_of(subtotal_cents, self.percent)
+
+
+def _best_combination(discounts) -> int:
+    """Soma os descontos empilháveis e acrescenta o maior não empilhável."""
+    stacked, best_exclusive = 0, 0
+    for rule, cents in discounts:
+        if rule.stackable:
+            stacked += cents
+        elif cents > best_exclusive:
+            best_exclusive = cents
+    return stacked + best_exclusive
+
+
+class PromotionEngine:
+    """Compila as regras uma vez; discount_cents(cart) avalia só as aplicáveis."""
+
+    def __init__(self, rules):
+        self._item_rules = {}         # {nome_item: [regras]}
+        self._thresholds = []         # Regras automáticas por valor, ordenadas pelo mínimo
+        self._code_thresholds = {}    # {código: [regras por valor]}
+        self._codes = set()
+        for rule in rules:
+            if rule.code is not None:
+                self._codes.add(rule.code)
+            if isinstance(rule, SpendThreshold):
+                if rule.code is None:
+                    self._thresholds.append(rule)
+                else:
+                    self._code_thresholds.setdefault(rule.code, []).append(rule)
+            else:
+                self._item_rules.setdefault(rule.item_name, []).append(rule)
+        self._thresholds.sort(key=lambda rule: rule.min_cents)
+        self._threshold_mins = [rule.min_cents for rule in self._thresholds]
+
+    def has_code(self, code: str) -> bool:
+        return code in self._codes
+
+    def _item_discount_cents(self, items: dict, codes) -> int:
+        total = 0
+        rule_index = self._item_rules
+        # Percorre o lado menor: linhas do carrinho ou itens com regras
+        if len(items) <= len(rule_index):
+            candidates = ((items[name], rule_index.get(name)) for name in items)
+        else:
+            candidates = ((items.get(name), rules) for name, rules in rule_index.items())
+        for item_obj, rules in candidates:
+            if item_obj is None or not rules:
+                continue
+            line_discount = _best_combination(
+                (rule, rule.line_discount_cents(item_obj))
+                for rule in rules if rule.code is None or rule.code in codes
+            )
+            total += min(line_discount, item_obj.total_cents)
+        return total
+
+    def _order_discount_cents(self, subtotal_cents: int, codes) -> int:
+        applicable = self._thresholds[:bisect.bisect_right(self._threshold_mins, subtotal_cents)]
+        for code in codes:
+            applicable.extend(
+                rule for rule in self._code_thresholds.get(code, ()) if rule.min_cents <= subtotal_cents
+            )
+        return _best_combination((rule, rule.order_discount_cents(subtotal_cents)) for rule in applicable)
+
+    def discount_cents(self, cart) -> int:
+        """Desconto total das promoções para o carrinho, em centavos (nunca maior que o subtotal)."""
+        codes = cart._promotion_codes
+        subtotal_cents = cart._subtotal_cents
+        discounted = subtotal_cents - self._item_discount_cents(cart._items, codes)
+        discounted -= min(self._order_discount_cents(discounted, codes), discounted)
+        return subtotal_cents - discounted
@@ -1,44 +1,193 @@
 # shopping_cart.py
 
+import os
 from decimal import Decimal, ROUND_HALF_UP
-from item import Item # Importa a classe Item
+from item import Item, _ZERO, _price_to_units, _units_to_decimal # Importa a classe Item
 # coupon_service.py não é modificado, então não precisa ser importado aqui se não for usado diretamente
 # mas o Cart o recebe no construtor.
 
+_HUNDRED = Decimal("100")
+_CENT = Decimal("0.01")
+_ZERO_TOTAL = Decimal("0.00")
+
+def _validate_line(name, quantity, unit_price) -> tuple[int, int]:
+    """
+    Valida uma linha (nome, quantidade, preço) com as mesmas regras e mensagens
+    de Cart.add_item e retorna o preço já convertido para (unidades, escala).
+    """
+    try:
+        units, scale = _price_to_units(unit_price)
+    except ValueError:
+        raise # Preço negativo ou não finito: a mensagem já é a do carrinho
+    except Exception:
+        raise ValueError("Preço unitário inválido fornecido ao carrinho.")
+
+    if not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError("A quantidade para adicionar deve ser um inteiro positivo.")
+
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("O nome do item não pode ser vazio.")
+    return units, scale
+
+
+def _normalize_coupon(coupon_data: dict | None) -> dict | None:
+    """
+    Valida os dados de cupom como Cart._set_coupon: retorna uma cópia com o
+    valor em Decimal, ou None se o cupom for vazio ou o valor for negativo ou inválido.
+    """
+    if not coupon_data:
+        return None
+    try:
+        # Garante que o valor do cupom seja Decimal
+        coupon_value = Decimal(str(coupon_data.get('value', 0)))
+        if coupon_value < _ZERO:
+            return None
+        # Copia antes de atualizar com o valor Decimal: o dicionário pode
+        # pertencer ao serviço (ou a um cache) e ser compartilhado entre carrinhos
+        coupon_data = dict(coupon_data)
+        coupon_data['value'] = coupon_value
+    except Exception:
+        return None
+    return coupon_data
+
+
+def _new_epoch() -> int:
+    """Versão inicial de uma instância de Cart: 48 bits aleatórios, deslocados para deixar espaço às mudanças."""
+    return int.from_bytes(os.urandom(6), "big") << 16
+
+
 class Cart:
-    def __init__(self, coupon_service=None):
+    DELTA_LOG_SIZE = 1024  # Mudanças de linha guardadas para changes_since()
+
+    def __init__(self, coupon_service=None, promotion_engine=None, price_table=None):
         self._items = {}  # Agora armazena {nome_item: InstanciaDeItem}
-        self._applied_coupon = None
+        self._subtotal_cents = 0  # Mantido por delta a cada mutação, em centavos
+        self._cached_total = None  # (subtotal_cents, total) do último get_total()
+        self._coupon = None
         self.coupon_service = coupon_service
+        self.promotion_engine = promotion_engine  # Opcional: promotions.PromotionEngine
+        self._promotion_codes = set()  # Códigos de promoção ativados via apply_coupon
+        self._index = None  # cart_views.CartIndex, criado no primeiro uso de view()
+        self.price_table = price_table  # Opcional: price_catalog.PriceTable
+        self._catalog_skus = {}  # {nome_item: sku} das linhas precificadas pelo catálogo
+        self._catalog_generation = None  # Geração da tabela usada nos preços dessas linhas
+        # Cresce a cada mudança de linha, cupom ou promoção. Começa em um valor
+        # aleatório por instância (época): versões de outra instância, inclusive do
+        # mesmo carrinho recarregado por load() ou recuperado de um repositório,
+        # caem fora do intervalo do log e recebem o snapshot completo.
+        self._version = _new_epoch()
+        self._delta_log = []  # [(versão, nome, linha_nova)], limitado a ~DELTA_LOG_SIZE
+        self._delta_floor = self._version  # Menor versão a partir da qual o log está completo
+
+    @property
+    def _applied_coupon(self):
+        return self._coupon
+
+    @_applied_coupon.setter
+    def _applied_coupon(self, value):
+        # Trocar o cupom é o único evento que invalida o total em cache;
+        # mudanças de itens são detectadas pela comparação do subtotal.
+        self._coupon = value
+        self._cached_total = None
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """Versão atual do carrinho, para uso com changes_since()."""
+        return self._version
+
+    def _line_changed(self, old_cents: int, new_cents: int, name: str | None = None, added: bool = False):
+        """
+        Ajusta o subtotal corrente pela diferença no total (em centavos) de uma linha.
+        Com `name`, registra também a mudança da linha (veja _record_line).
+        """
+        self._subtotal_cents += new_cents - old_cents
+        if name is not None:
+            self._record_line(name, added)
+
+    def _record_line(self, name: str, added: bool = False):
+        """
+        Registra que a linha `name` mudou (added=True se ela não existia antes):
+        nova versão, entrada no log de deltas e atualização dos índices das views.
+        """
+        self._version += 1
+        log = self._delta_log
+        log.append((self._version, name, added))
+        if len(log) >= 2 * self.DELTA_LOG_SIZE: # Corte amortizado das entradas mais antigas
+            cut = len(log) - self.DELTA_LOG_SIZE
+            self._delta_floor = log[cut - 1][0]
+            del log[:cut]
+        if self._index is not None:
+            self._index.update(name)
+
+    def _reset_delta_log(self):
+        """Descarta o log: clientes em versões anteriores recebem um snapshot completo."""
+        self._version += 1
+        self._delta_log = []
+        self._delta_floor = self._version
 
     def add_item(self, name: str, quantity: int, unit_price: float | str | Decimal):
         """Adiciona um item ao carrinho ou atualiza sua quantidade e preço."""
-        # A classe Item já faz validações de nome, quantidade e preço.
-        # A lógica aqui é para atualizar um item existente ou adicionar um novo.
-        try:
-            # Tenta converter unit_price para Decimal aqui para consistência,
-            # embora o Item.__init__ e o setter também façam.
-            price_decimal = Decimal(str(unit_price))
-        except Exception:
-            raise ValueError("Preço unitário inválido fornecido ao carrinho.")
-
-        if price_decimal < Decimal("0"):
-            raise ValueError("O preço unitário não pode ser negativo.")
-        
-        if not isinstance(quantity, int) or quantity <= 0:
-            raise ValueError("A quantidade para adicionar deve ser um inteiro positivo.")
-        
-        if not isinstance(name, str) or not name.strip():
-            raise ValueError("O nome do item não pode ser vazio.")
+        # O preço é convertido uma única vez para (unidades, escala) e repassado
+        # já validado ao Item, sem nova conversão nem Decimal intermediário.
+        units, scale = _validate_line(name, quantity, unit_price)
 
-
-        if name in self._items:
-            existing_item = self._items[name]
-            existing_item.quantity += quantity
-            existing_item.unit_price = price_decimal # Atualiza o preço unitário do item existente
+        existing_item = self._items.get(name)
+        if existing_item is not None:
+            old_cents = existing_item.total_cents
+            existing_item._quantity += quantity
+            existing_item._price_units = units # Atualiza o preço unitário do item existente
+            existing_item._price_scale = scale
+            self._line_changed(old_cents, existing_item.total_cents, name)
+            if self._catalog_skus:
+                self._catalog_skus.pop(name, None) # Preço informado prevalece sobre o catálogo
         else:
-            # A classe Item cuidará da validação detalhada ao criar a instância
-            self._items[name] = Item(name=name, quantity=quantity, unit_price=price_decimal)
+            new_item = self._items[name] = Item._from_units(name, quantity, units, scale)
+            self._line_changed(0, new_item.total_cents, name, added=True)
+
+    def add_sku(self, sku: int, quantity: int, name: str | None = None):
+        """
+        Adiciona um item com o preço do SKU na price_table (veja price_catalog).
+        O nome da linha é `name` ou "SKU <sku>". Quando o catálogo é atualizado,
+        a linha é reprecificada no próximo get_total(), até que add_item ou
+        add_items informem um preço para ela, que passa a valer no lugar do catálogo.
+        """
+        if self.price_table is None:
+            raise ValueError("O carrinho não tem uma tabela de preços (price_table).")
+        self._refresh_catalog_prices(remap=False) # Linhas antigas e a nova na mesma geração
+        try:
+            cents = self.price_table.price_cents(sku)
+        except KeyError:
+            raise ValueError(f"SKU sem preço no catálogo: {sku!r}")
+        if name is None:
+            name = f"SKU {sku}"
+        self.add_item(name, quantity, _units_to_decimal(cents, 2))
+        self._catalog_skus[name] = sku
+
+    def _refresh_catalog_prices(self, remap: bool = True):
+        """
+        Reprecifica as linhas de SKU se a tabela de preços mudou de geração.
+        Com remap=False usa o mapeamento já aberto, sem verificar o arquivo.
+        """
+        table = self.price_table
+        if table is None:
+            return
+        generation = table.refresh() if remap else table.generation
+        if generation == self._catalog_generation:
+            return
+        items = self._items
+        for name, sku in list(self._catalog_skus.items()):
+            item_obj = items.get(name)
+            if item_obj is None:
+                del self._catalog_skus[name] # Linha removida do carrinho
+                continue
+            cents = table.get(sku)
+            if cents is None:
+                continue # SKU saiu do catálogo: mantém o último preço conhecido
+            old_cents = item_obj.total_cents
+            item_obj._price_units, item_obj._price_scale = cents, 2
+            self._line_changed(old_cents, item_obj.total_cents, name)
+        self._catalog_generation = generation
 
     def remove_item(self, name: str, quantity_to_remove: int | None = None):
         """Remove um item do carrinho ou diminui sua quantidade."""
@@ -49,74 +198,236 @@ class Cart:
 
         if quantity_to_remove is None or quantity_to_remove >= item_in_cart.quantity:
             del self._items[name]
+            self._line_changed(item_in_cart.total_cents, 0, name)
+            self._catalog_skus.pop(name, None)
         elif quantity_to_remove > 0:
+            old_cents = item_in_cart.total_cents
             item_in_cart.quantity -= quantity_to_remove
+            self._line_changed(old_cents, item_in_cart.total_cents, name)
         elif quantity_to_remove <= 0: # Não permitir remover quantidade zero ou negativa
             raise ValueError("A quantidade a ser removida deve ser positiva.")
 
+    def add_items(self, lines):
+        """
+        Adiciona várias linhas de uma vez, de forma atômica.
+
+        Cada linha pode ser uma tupla (nome, quantidade, preço) ou um dicionário com
+        as chaves "name", "quantity" e "unit_price" (veja cart_import para ler CSV
+        ou JSON lines). O lote inteiro é validado em uma única passada e nomes
+        repetidos são mesclados como em chamadas sucessivas de add_item (as
+        quantidades somam e o último preço prevalece). Se qualquer linha for
+        inválida, nenhuma é aplicada.
+        """
+        batch = {}  # {nome: [quantidade, (unidades, escala)]}
+        parsed_prices = {}  # Preços repetidos no lote são convertidos uma única vez
+        for line in lines:
+            if isinstance(line, dict):
+                name, quantity, unit_price = line.get("name"), line.get("quantity"), line.get("unit_price")
+            else:
+                name, quantity, unit_price = line
+
+            # Só preços em texto entram no cache: Decimal("1.0") e Decimal("1.00")
+            # são chaves iguais, mas têm escalas diferentes.
+            price = parsed_prices.get(unit_price) if isinstance(unit_price, str) else None
+            if price is None:
+                price = _validate_line(name, quantity, unit_price)
+                if isinstance(unit_price, str):
+                    parsed_prices[unit_price] = price
+            elif not isinstance(quantity, int) or quantity <= 0 or not isinstance(name, str) or not name.strip():
+                _validate_line(name, quantity, unit_price) # Levanta o erro com a mensagem padrão
+
+            pending = batch.get(name)
+            if pending is None:
+                batch[name] = [quantity, price]
+            else:
+                pending[0] += quantity
+                pending[1] = price
+
+        # Daqui em diante nada pode falhar: o lote já foi validado por completo.
+        items = self._items
+        catalog_skus = self._catalog_skus
+        delta_cents = 0
+        for name, (quantity, (units, scale)) in batch.items():
+            existing_item = items.get(name)
+            if existing_item is not None:
+                delta_cents -= existing_item.total_cents
+                existing_item._quantity += quantity
+                existing_item._price_units = units
+                existing_item._price_scale = scale
+                self._record_line(name)
+                if catalog_skus:
+                    catalog_skus.pop(name, None)
+            else:
+                existing_item = items[name] = Item._from_units(name, quantity, units, scale)
+                self._record_line(name, added=True)
+            delta_cents += existing_item.total_cents
+        self._line_changed(0, delta_cents)
+
+    def remove_items(self, lines):
+        """
+        Remove várias linhas de uma vez, de forma atômica.
+
+        Cada linha pode ser só o nome (remove o item inteiro), uma tupla
+        (nome, quantidade) ou um dicionário com "name" e "quantity" opcional.
+        Quantidades repetidas para o mesmo nome são somadas e itens que não estão
+        no carrinho são ignorados, como em remove_item.
+        """
+        batch = {}  # {nome: quantidade a remover, ou None para remover tudo}
+        for line in lines:
+            if isinstance(line, str):
+                name, quantity_to_remove = line, None
+            elif isinstance(line, dict):
+                name, quantity_to_remove = line.get("name"), line.get("quantity")
+            else:
+                name, quantity_to_remove = line
+            if name not in self._items:
+                continue
+            if quantity_to_remove is not None:
+                if not isinstance(quantity_to_remove, int):
+                    raise ValueError("A quantidade a ser removida deve ser um inteiro positivo.")
+                if quantity_to_remove <= 0:
+                    raise ValueError("A quantidade a ser removida deve ser positiva.")
+
+            if name in batch:
+                if batch[name] is None or quantity_to_remove is None:
+                    batch[name] = None
+                else:
+                    batch[name] += quantity_to_remove
+            else:
+                batch[name] = quantity_to_remove
+
+        for name, quantity_to_remove in batch.items():
+            item_in_cart = self._items[name]
+            if quantity_to_remove is None or quantity_to_remove >= item_in_cart.quantity:
+                del self._items[name]
+                self._line_changed(item_in_cart.total_cents, 0, name)
+                self._catalog_skus.pop(name, None)
+            else:
+                old_cents = item_in_cart.total_cents
+                item_in_cart.quantity -= quantity_to_remove
+                self._line_changed(old_cents, item_in_cart.total_cents, name)
+
     def _calculate_subtotal(self) -> Decimal:
-        """Calcula o subtotal dos itens no carrinho."""
-        total = Decimal("0.00")
-        for item_obj in self._items.values():
-            total += item_obj.total_price # Usa a propriedade total_price da classe Item
-        return total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        """
+        Retorna o subtotal dos itens no carrinho.
+
+        O subtotal é mantido incrementalmente por add_item/remove_item/clear_cart
+        (soma dos totais já arredondados por linha, em centavos), então a leitura é O(1).
+        """
+        return _units_to_decimal(self._subtotal_cents, 2)
 
     def apply_coupon(self, coupon_code: str) -> bool:
         """
         Aplica um cupom de desconto ao carrinho.
-        Requer que um coupon_service tenha sido injetado na criação do carrinho.
+        Requer que um coupon_service tenha sido injetado na criação do carrinho,
+        exceto para códigos do promotion_engine, que são ativados diretamente e
+        se acumulam com o cupom.
         """
+        if self._activate_promotion_code(coupon_code):
+            return True
         if not self.coupon_service:
             return False
 
         coupon_data = self.coupon_service.validate_coupon(coupon_code)
-        if coupon_data:
-            # Valida o valor do cupom antes de aplicar
-            try:
-                # Garante que o valor do cupom seja Decimal
-                coupon_value = Decimal(str(coupon_data.get('value', 0)))
-                if coupon_value < Decimal("0"):
-                    # print("Valor do cupom inválido (negativo), não aplicando.")
-                    self._applied_coupon = None
-                    return False
-                
-                # Atualiza coupon_data com o valor Decimal
-                coupon_data['value'] = coupon_value
-                self._applied_coupon = coupon_data
-
-            except Exception:
-                # print(f"Valor do cupom '{coupon_code}' não é um número válido.")
-                self._applied_coupon = None
-                return False
-            return True
-        else:
-            self._applied_coupon = None # Remove qualquer cupom anterior se o novo for inválido
+        return self._set_coupon(coupon_data)
+
+    def _activate_promotion_code(self, coupon_code: str) -> bool:
+        """Ativa o código se ele pertencer ao promotion_engine. Retorna se foi ativado."""
+        if self.promotion_engine is None or not self.promotion_engine.has_code(coupon_code):
             return False
+        self._promotion_codes.add(coupon_code)
+        self._version += 1
+        return True
+
+    def _set_coupon(self, coupon_data: dict | None) -> bool:
+        """
+        Aplica os dados de cupom já retornados pelo serviço (validate_coupon).
+        Separado de apply_coupon para ser reaproveitado por variantes que consultam
+        o serviço de outra forma (ex.: AsyncCart).
+        """
+        coupon = _normalize_coupon(coupon_data)
+        self._applied_coupon = coupon # Remove qualquer cupom anterior se o novo for inválido
+        return coupon is not None
 
     def get_total(self) -> Decimal:
         """Calcula o valor total do carrinho, aplicando descontos se houver."""
+        if self._catalog_skus:
+            self._refresh_catalog_prices()
+        cached = self._cached_total
+        if cached is not None and cached[0] == self._subtotal_cents and self.promotion_engine is None:
+            return cached[1]
+        final_total = self._total_with_coupon(self._applied_coupon)
+        self._cached_total = (self._subtotal_cents, final_total)
+        return final_total
+
+    def _total_with_coupon(self, coupon: dict | None) -> Decimal:
+        """Total do carrinho com o cupom informado (que não precisa estar aplicado)."""
         subtotal = self._calculate_subtotal()
+        if self.promotion_engine is not None:
+            # O cupom incide sobre o subtotal já descontado pelas promoções
+            promotion_cents = self.promotion_engine.discount_cents(self)
+            subtotal = _units_to_decimal(self._subtotal_cents - promotion_cents, 2)
+        if not coupon:
+            # Já em centavos exatos; quantize limitaria o total aos 28 dígitos do contexto
+            return max(_ZERO_TOTAL, subtotal)
         total_after_discount = subtotal
 
-        if self._applied_coupon:
-            discount_type = self._applied_coupon.get('type')
-            # O valor já deve ser Decimal se apply_coupon foi bem-sucedido
-            discount_value = self._applied_coupon.get('value', Decimal("0"))
-
-            if discount_type == 'percentage':
-                if discount_value > Decimal("100"): # Cap de 100% para desconto percentual
-                    discount_value = Decimal("100")
-                elif discount_value < Decimal("0"): # Não permitir percentual negativo
-                    discount_value = Decimal("0")
-                
-                discount_amount = (subtotal * discount_value) / Decimal("100")
-                total_after_discount -= discount_amount
-            elif discount_type == 'fixed':
-                # discount_value já é Decimal e validado como não negativo em apply_coupon
-                total_after_discount -= discount_value
+        discount_type = coupon.get('type')
+        # O valor já deve ser Decimal se apply_coupon foi bem-sucedido
+        discount_value = coupon.get('value', _ZERO)
+
+        if discount_type == 'percentage':
+            if discount_value > _HUNDRED: # Cap de 100% para desconto percentual
+                discount_value = _HUNDRED
+            elif discount_value < _ZERO: # Não permitir percentual negativo
+                discount_value = _ZERO
+            
+            discount_amount = (subtotal * discount_value) / _HUNDRED
+            total_after_discount -= discount_amount
+        elif discount_type == 'fixed':
+            # discount_value já é Decimal e validado como não negativo em apply_coupon
+            total_after_discount -= discount_value
         
-        final_total = max(Decimal("0.00"), total_after_discount)
-        return final_total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        final_total = max(_ZERO_TOTAL, total_after_discount)
+        return final_total.quantize(_CENT, rounding=ROUND_HALF_UP)
+
+    def changes_since(self, version: int) -> dict:
+        """
+        Mudanças desde `version` (um valor anterior de cart.version), para
+        sincronizar clientes sem reenviar o carrinho inteiro:
+
+            {"version": versão atual, "full": bool, "added": [...], "modified": [...],
+             "removed": [nomes], "total": Decimal}
+
+        added e modified trazem linhas no formato de list_items(). Se `version`
+        for mais antiga que o log mantido (DELTA_LOG_SIZE mudanças de linha), anterior
+        a um clear_cart/load, de outra instância (ex.: antes de Cart.load ou da
+        recuperação pelo repositório) ou desconhecida, full=True e added traz todas as linhas.
+        """
+        total = self.get_total() # Pode reprecificar linhas do catálogo (e mudar a versão)
+        current = self._version
+        if not isinstance(version, int) or not self._delta_floor <= version <= current:
+            return {"version": current, "full": True, "added": self.list_items(),
+                    "modified": [], "removed": [], "total": total}
+
+        added_since = {}  # {nome: a linha não existia em `version`}
+        for entry_version, name, added in reversed(self._delta_log):
+            if entry_version <= version:
+                break
+            added_since[name] = added # A entrada mais antiga prevalece
+        items = self._items
+        added, modified, removed = [], [], []
+        for name, was_added in added_since.items():
+            item_obj = items.get(name)
+            if item_obj is None:
+                if not was_added:
+                    removed.append(name)
+            elif was_added:
+                added.append(item_obj.to_dict())
+            else:
+                modified.append(item_obj.to_dict())
+        return {"version": current, "full": False, "added": added,
+                "modified": modified, "removed": removed, "total": total}
 
     def list_items(self) -> list[dict]:
         """Lista os itens no carrinho usando o método to_dict() de cada Item."""
@@ -125,7 +436,46 @@ class Cart:
         
         return [item_obj.to_dict() for item_obj in self._items.values()]
 
+    def view(self):
+        """
+        View preguiçosa e sem cópia dos itens (cart_views.CartView): iteração,
+        maiores totais de linha, busca por prefixo e paginação por cursor.
+        """
+        from cart_views import CartView
+        return CartView(self)
+
+    def dump(self, fmt: str = "binary") -> bytes | str:
+        """
+        Serializa itens e cupom em formato binário compacto (bytes) ou JSON (str).
+        Os formatos estão descritos em cart_serialization.
+        """
+        import cart_serialization
+        return cart_serialization.dump(self, fmt)
+
+    @classmethod
+    def load(cls, data: bytes | str, coupon_service=None, trusted: bool = False) -> "Cart":
+        """
+        Reconstrói um carrinho a partir de Cart.dump(). Com trusted=True as linhas
+        não são revalidadas (apenas para dados gerados por dump() em local confiável).
+        """
+        import cart_serialization
+        return cart_serialization.load(data, cart_class=cls, coupon_service=coupon_service, trusted=trusted)
+
+    def _restore(self, items: dict, coupon: dict | None):
+        """Substitui todo o conteúdo por itens e cupom já validados."""
+        self._items = items
+        self._subtotal_cents = sum(item_obj.total_cents for item_obj in items.values())
+        self._index = None
+        self._catalog_skus = {}
+        self._applied_coupon = coupon
+        self._reset_delta_log()
+
     def clear_cart(self):
         """Limpa todos os itens e o cupom aplicado do carrinho."""
         self._items = {}
-        self._applied_coupon = None
\ No newline at end of file
+        self._subtotal_cents = 0
+        self._index = None
+        self._catalog_skus = {}
+        self._promotion_codes = set()
+        self._applied_coupon = None
+        self._reset_delta_log()
\ No newline at end of file
@@ -0,0 +1,79 @@
+# test_async_cart.py
+import asyncio
+import unittest
+from decimal import Decimal
+
+from async_cart import AsyncCart, AsyncCouponService
+from coupon_service import CouponService, LatencyCouponService
+
+class AsyncLatencyCouponService(CouponService):
+    """Serviço de cupons assíncrono com latência artificial."""
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    async def validate_coupon(self, coupon_code):
+        await asyncio.sleep(self.latency)
+        return super().validate_coupon(coupon_code)
+
+
+class TestAsyncCart(unittest.IsolatedAsyncioTestCase):
+    async def test_apply_coupon_with_sync_service(self):
+        cart = AsyncCart(coupon_service=CouponService())
+        cart.add_item("Produto", 2, "20.00")
+        self.assertTrue(await cart.apply_coupon("5OFF"))
+        self.assertEqual(cart.get_total(), Decimal("35.00"))
+        self.assertFalse(await cart.apply_coupon("NAOEXISTE"))
+        self.assertEqual(cart.get_total(), Decimal("40.00"))
+
+    async def test_apply_coupon_with_async_service(self):
+        cart = AsyncCart(coupon_service=AsyncLatencyCouponService(0.01))
+        cart.add_item("Produto", 1, "100.00")
+        self.assertTrue(await cart.apply_coupon("SAVE10"))
+        self.assertEqual(cart.get_total(), Decimal("90.00"))
+
+    async def test_timeout_keeps_current_coupon(self):
+        cart = AsyncCart(coupon_service=CouponService(), timeout=0.05)
+        cart.add_item("Produto", 1, "100.00")
+        await cart.apply_coupon("SAVE10")
+
+        cart.coupon_service = AsyncCouponService(AsyncLatencyCouponService(1), timeout=0.05)
+        with self.assertRaises(asyncio.TimeoutError):
+            await cart.apply_coupon("5OFF")
+        self.assertEqual(cart.get_total(), Decimal("90.00"))
+
+    async def test_validate_coupons_runs_concurrently(self):
+        service = AsyncCouponService(AsyncLatencyCouponService(0.1))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await service.validate_coupons(["SAVE10", "5OFF", "NAOEXISTE", "SAVE10"])
+        self.assertLess(loop.time() - started, 0.25)
+        self.assertEqual(set(results), {"SAVE10", "5OFF", "NAOEXISTE"})
+        self.assertIsNone(results["NAOEXISTE"])
+
+    async def test_apply_best_coupon_picks_lowest_total(self):
+        cart = AsyncCart(coupon_service=LatencyCouponService(latency=0.01))
+        cart.add_item("Produto", 1, "30.00") # SAVE10 -> 27.00, 5OFF -> 25.00
+        self.assertEqual(await cart.apply_best_coupon(["SAVE10", "5OFF", "NAOEXISTE"]), "5OFF")
+        self.assertEqual(cart.get_total(), Decimal("25.00"))
+
+        cart.add_item("Produto", 9, "30.00") # SAVE10 -> 270.00, 5OFF -> 295.00
+        self.assertEqual(await cart.apply_best_coupon(["5OFF", "SAVE10"]), "SAVE10")
+        self.assertEqual(cart.get_total(), Decimal("270.00"))
+
+        self.assertIsNone(await cart.apply_best_coupon(["NAOEXISTE"]))
+        self.assertEqual(cart.get_total(), Decimal("300.00"))
+
+    async def test_apply_best_coupon_sets_coupon_once(self):
+        cart = AsyncCart(coupon_service=LatencyCouponService(latency=0.01))
+        cart.add_item("Produto", 1, "30.00")
+        applied = []
+        original = cart._set_coupon
+        cart._set_coupon = lambda coupon_data: applied.append(coupon_data) or original(coupon_data)
+        version = cart.version
+        self.assertEqual(await cart.apply_best_coupon(["SAVE10", "5OFF", "NAOEXISTE"]), "5OFF")
+        self.assertEqual(len(applied), 1) # Os candidatos são avaliados sem aplicar
+        self.assertEqual(cart.version, version + 1)
+
+if __name__ == '__main__':
+    unittest.main()
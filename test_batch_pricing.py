@@ -0,0 +1,59 @@
+# test_batch_pricing.py
+import random
+import unittest
+from decimal import Decimal
+
+import batch_pricing
+from batch_pricing import price_carts, price_columns
+from shopping_cart import Cart
+
+class TestBatchPricing(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(20240501)
+        coupons = [
+            None,
+            {"type": "percentage", "value": Decimal("10")},
+            {"type": "percentage", "value": Decimal("12.5")},
+            {"type": "percentage", "value": Decimal("150")},   # Limitado a 100%
+            {"type": "fixed", "value": Decimal("5.0")},
+            {"type": "fixed", "value": Decimal("3.335")},
+            {"type": "fixed", "value": Decimal("100000")},     # Total vai a zero
+            {"type": "desconhecido", "value": Decimal("50")},
+        ]
+        self.carts = []
+        for _ in range(300):
+            cart = Cart()
+            for line in range(rng.randint(0, 12)):
+                price = f"{rng.randint(0, 50000) / 10 ** rng.choice((0, 1, 2, 3, 4)):.{rng.choice((0, 2, 3))}f}"
+                cart.add_item(f"Item {line}", rng.randint(1, 9), price)
+            cart._applied_coupon = rng.choice(coupons)
+            self.carts.append(cart)
+
+    def _assert_matches_carts(self, result):
+        self.assertEqual(result.totals_as_decimal(), [cart.get_total() for cart in self.carts])
+        for subtotal, cart in zip(result.subtotals, self.carts):
+            self.assertEqual(int(subtotal), cart._subtotal_cents)
+
+    def test_pure_python_matches_cart_get_total(self):
+        self._assert_matches_carts(price_carts(self.carts, use_numpy=False))
+
+    @unittest.skipIf(batch_pricing.np is None, "NumPy não instalado")
+    def test_numpy_matches_cart_get_total(self):
+        self._assert_matches_carts(price_carts(self.carts, use_numpy=True))
+
+    def test_columnar_input_reports_line_totals_and_discounts(self):
+        result = price_columns(
+            cart_ids=[0, 0, 1],
+            quantities=[3, 2, 1],
+            price_units=[335, 199, 1000],
+            price_scales=[3, 2, 2],
+            coupons=[{"type": "percentage", "value": 10}, {"type": "fixed", "value": "2.5"}],
+            use_numpy=False,
+        )
+        self.assertEqual(result.line_totals, [101, 398, 1000])  # 1.005 -> 1.01
+        self.assertEqual(result.subtotals, [499, 1000])
+        self.assertEqual(result.totals, [449, 750])            # 4.491 -> 4.49
+        self.assertEqual(result.discounts, [50, 250])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# test_carrinho.py
+import os
+import subprocess
+import sys
+import unittest
+from decimal import Decimal
+
+import carrinho
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Orçamentos folgados (máquinas de CI lentas, módulos compilados sem .pyc);
+# a medição típica está em `python benchmarks.py startup`.
+IMPORT_BUDGET_SECONDS = 0.075
+FIRST_TOTAL_BUDGET_SECONDS = 0.100
+HEAVY_MODULES = {
+    "asyncio", "concurrent", "csv", "json", "logging", "mmap", "multiprocessing",
+    "numpy", "sqlite3", "struct", "threading",
+}
+
+def _run(script: str, *flags) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", script], cwd=HERE,
+                          capture_output=True, text=True, check=True)
+
+
+class TestLightweightEntryPoint(unittest.TestCase):
+    def test_import_does_not_load_optional_subsystems(self):
+        done = _run("import sys, carrinho; print(' '.join(sys.modules))")
+        loaded = {name.split(".")[0] for name in done.stdout.split()}
+        self.assertEqual(loaded & HEAVY_MODULES, set())
+        self.assertNotIn("coupon_service", loaded)
+        self.assertNotIn("batch_pricing", loaded)
+
+    def test_startup_budget(self):
+        script = (
+            "import time; started = time.perf_counter()\n"
+            "import carrinho\n"
+            "cart = carrinho.Cart(); cart.add_item('Café', 2, '9.90')\n"
+            "assert str(cart.get_total()) == '19.80'\n"
+            "print(time.perf_counter() - started)\n"
+        )
+        done = _run(script, "-X", "importtime")
+        import_us = [
+            int(line.split("|")[1]) for line in done.stderr.splitlines()
+            if line.startswith("import time:") and line.rstrip().endswith("| carrinho")
+        ]
+        self.assertEqual(len(import_us), 1)
+        self.assertLess(import_us[0] / 1e6, IMPORT_BUDGET_SECONDS)
+        self.assertLess(float(done.stdout), FIRST_TOTAL_BUDGET_SECONDS)
+
+    def test_lazy_attributes(self):
+        import coupon_service
+        self.assertIs(carrinho.CouponService, coupon_service.CouponService)
+        self.assertIn("CouponService", vars(carrinho)) # Cacheado após o primeiro acesso
+        self.assertIn("analyze_json_lines", dir(carrinho))
+        with self.assertRaises(AttributeError):
+            carrinho.NaoExiste
+
+        cart = carrinho.Cart(coupon_service=carrinho.CouponService())
+        cart.add_item("Café", 1, "10.00")
+        cart.apply_coupon("SAVE10")
+        self.assertEqual(cart.get_total(), Decimal("9.00"))
+
+    def test_every_lazy_name_resolves(self):
+        for name in carrinho.__all__:
+            with self.subTest(name=name):
+                self.assertIsNotNone(getattr(carrinho, name))
+
+if __name__ == '__main__':
+    unittest.main()
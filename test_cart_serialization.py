@@ -0,0 +1,80 @@
+# test_cart_serialization.py
+import json
+import unittest
+from decimal import Decimal
+
+from concurrent_cart import ConcurrentCart
+from coupon_service import CouponService
+from shopping_cart import Cart
+
+class TestCartSerialization(unittest.TestCase):
+    def setUp(self):
+        self.cart = Cart(coupon_service=CouponService())
+        self.cart.add_item("Maçã", 3, "0.335")
+        self.cart.add_item("Pão francês", 10, "0.90")
+        self.cart.add_item("Café", 1, 10)
+        self.cart.apply_coupon("SAVE10")
+
+    def _assert_same_cart(self, restored):
+        self.assertEqual(restored.list_items(), self.cart.list_items())
+        self.assertEqual(restored._applied_coupon, self.cart._applied_coupon)
+        self.assertEqual(restored.get_total(), self.cart.get_total())
+
+    def test_round_trip_binary_and_json(self):
+        for fmt in ("binary", "json"):
+            for trusted in (False, True):
+                with self.subTest(fmt=fmt, trusted=trusted):
+                    self._assert_same_cart(Cart.load(self.cart.dump(fmt), trusted=trusted))
+
+    def test_dump_formats(self):
+        self.assertIsInstance(self.cart.dump(), bytes)
+        document = json.loads(self.cart.dump("json"))
+        self.assertEqual(document["coupon"], {"type": "percentage", "value": "10"})
+        self.assertIn(["Maçã", 3, 335, 3], document["items"])
+        with self.assertRaisesRegex(ValueError, "Formato de serialização desconhecido"):
+            self.cart.dump("xml")
+
+    def test_empty_cart_round_trip(self):
+        restored = Cart.load(Cart().dump())
+        self.assertEqual(restored.list_items(), [])
+        self.assertIsNone(restored._applied_coupon)
+        self.assertEqual(restored.get_total(), Decimal("0.00"))
+
+    def test_untrusted_load_revalidates_lines(self):
+        document = json.loads(self.cart.dump("json"))
+        document["items"].append(["Brinde", 0, 100, 2])
+        with self.assertRaisesRegex(ValueError, "A quantidade para adicionar deve ser um inteiro positivo."):
+            Cart.load(json.dumps(document))
+
+        document = json.loads(self.cart.dump("json"))
+        document["coupon"]["value"] = "-5"
+        with self.assertRaisesRegex(ValueError, "Cupom inválido"):
+            Cart.load(json.dumps(document))
+
+    def test_corrupted_binary_data_is_rejected(self):
+        data = self.cart.dump()
+        with self.assertRaisesRegex(ValueError, "Dados binários de carrinho inválidos"):
+            Cart.load(data[:-4])
+
+    def test_binary_is_smaller_than_json(self):
+        cart = Cart()
+        for i in range(200):
+            cart.add_item(f"Produto {i}", i % 7 + 1, f"{i * 3.7 + 0.99:.2f}")
+        self.assertLess(len(cart.dump("binary")), len(cart.dump("json")))
+
+    def test_wide_columns_round_trip(self):
+        self.cart.add_item("Lote", 70_000, "123456789012.345")
+        data = self.cart.dump()
+        self.assertIn(b"BIQB", data) # Larguras das colunas: nome, quantidade, unidades, escala
+        self.assertEqual(Cart.load(data).list_items(), self.cart.list_items())
+        with self.assertRaisesRegex(ValueError, "Dados binários de carrinho inválidos"):
+            Cart.load(data.replace(b"BIQB", b"BIXB"))
+
+    def test_load_keeps_cart_subclass(self):
+        restored = ConcurrentCart.load(self.cart.dump(), coupon_service=CouponService(), trusted=True)
+        self.assertIsInstance(restored, ConcurrentCart)
+        self.assertEqual(restored.get_total(), self.cart.get_total())
+        self.assertIsInstance(restored.coupon_service, CouponService)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# test_cart_service.py
+import unittest
+from decimal import Decimal
+
+from cart_service import ShardedCartService, shard_for
+
+class TestShardedCartService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ShardedCartService(workers=2, batch_size=8)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.close()
+
+    def test_shard_is_stable(self):
+        self.assertEqual(shard_for("cliente-1", 4), shard_for("cliente-1", 4))
+        self.assertEqual({shard_for(f"c{i}", 2) for i in range(20)}, {0, 1})
+
+    def test_operations_are_routed_to_the_owning_worker(self):
+        service = self.service
+        service.add_item("rota-a", "Café", 2, "10.00")
+        service.add_item("rota-b", "Pão", 3, "1.50")
+        service.add_item("rota-a", "Café", 1, "10.00")
+        self.assertTrue(service.apply_coupon("rota-a", "SAVE10"))
+        self.assertFalse(service.apply_coupon("rota-b", "NAOEXISTE"))
+        service.remove_item("rota-b", "Pão", 1)
+
+        self.assertEqual(service.get_total("rota-a"), Decimal("27.00"))
+        self.assertEqual(service.get_total("rota-b"), Decimal("3.00"))
+        self.assertEqual(service.list_items("rota-b")[0]["quantity"], 2)
+
+    def test_batched_submissions(self):
+        futures = [self.service.submit(f"lote-{i % 5}", "add_item", "Item", 1, "0.10") for i in range(50)]
+        totals = [self.service.submit(f"lote-{i}", "get_total") for i in range(5)]
+        self.service.flush()
+        self.assertTrue(all(f.result(10) is None for f in futures))
+        self.assertEqual([f.result(10) for f in totals], [Decimal("1.00")] * 5)
+
+    def test_cart_errors_are_propagated(self):
+        with self.assertRaisesRegex(ValueError, "quantidade"):
+            self.service.add_item("erro", "Produto", 0, "1.00")
+        with self.assertRaisesRegex(ValueError, "Operação desconhecida"):
+            self.service.submit("erro", "_restore")
+
+    def test_unpicklable_request_fails_alone(self):
+        valid = self.service.submit("serializacao", "add_item", "Produto", 1, "2.00")
+        broken = self.service.submit("serializacao", "add_items", (line for line in []))
+        total = self.service.submit("serializacao", "get_total")
+        self.service.flush()
+        with self.assertRaises(TypeError):
+            broken.result(10)
+        self.assertIsNone(valid.result(10))
+        self.assertEqual(total.result(10), Decimal("2.00"))
+        self.assertEqual(self.service._pending, {})
+
+    def test_dead_worker_fails_its_shard(self):
+        with ShardedCartService(workers=2, batch_size=100) as service:
+            dead, alive = shard_for("morto", 2), shard_for("vivo", 2)
+            self.assertNotEqual(dead, alive)
+            service.add_item("morto", "Produto", 1, "1.00")
+            pending = service.submit("morto", "get_total") # Ainda no buffer
+            service._processes[dead].kill()
+            service._processes[dead].join()
+            service.flush()
+            with self.assertRaisesRegex(RuntimeError, "terminou"):
+                pending.result(5)
+            with self.assertRaisesRegex(RuntimeError, "terminou"):
+                service.get_total("morto")
+            service.add_item("vivo", "Produto", 2, "1.00") # O outro shard continua atendendo
+            self.assertEqual(service.get_total("vivo"), Decimal("2.00"))
+
+    def test_closed_service_rejects_requests(self):
+        service = ShardedCartService(workers=1)
+        service.add_item("x", "Produto", 1, "1.00")
+        service.close()
+        with self.assertRaises(RuntimeError):
+            service.get_total("x")
+
+if __name__ == '__main__':
+    unittest.main()
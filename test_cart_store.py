@@ -0,0 +1,130 @@
+# test_cart_store.py
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from cart_store import CartRepository, InMemoryCartStore, SQLiteCartStore
+from coupon_service import CouponService
+
+class CartStoreTestMixin:
+    def make_store(self):
+        raise NotImplementedError
+
+    def reopen_store(self, store):
+        return store
+
+    def _fill(self, repository):
+        cart = repository.get("c1")
+        cart.add_item("Arroz", 2, "5.49")
+        cart.add_item("Feijão", 1, 7.9)
+        cart.add_items([("Sal", 3, "1.50"), {"name": "Arroz", "quantity": 1, "unit_price": "5.29"}])
+        cart.remove_item("Sal", 1)
+        cart.remove_items([("Feijão", 1), "Inexistente"])
+        cart.apply_coupon("5OFF")
+        repository.get("c2").add_item("Café", 1, "10.25")
+        return cart
+
+    def test_recovery_replays_operation_log(self):
+        store = self.make_store()
+        original = self._fill(CartRepository(store, coupon_service=CouponService()))
+
+        recovered = CartRepository(self.reopen_store(store), coupon_service=CouponService()).get("c1")
+        self.assertEqual(recovered.list_items(), original.list_items())
+        self.assertEqual(recovered._applied_coupon, original._applied_coupon)
+        self.assertEqual(recovered.get_total(), Decimal("13.87")) # 3 * 5.29 + 2 * 1.50 - 5.00
+
+    def test_snapshot_compacts_log_and_recovery_uses_it(self):
+        store = self.make_store()
+        repository = CartRepository(store, coupon_service=CouponService(), snapshot_every=3)
+        original = self._fill(repository)
+        original.clear_cart()
+        original.add_item("Leite", 2, "4.50")
+
+        snapshot, operations = store.load("c1")
+        self.assertIsNotNone(snapshot)
+        self.assertLess(len(operations), 3)
+
+        recovered = CartRepository(self.reopen_store(store)).get("c1")
+        self.assertEqual(recovered.list_items(), original.list_items())
+        self.assertEqual(recovered.get_total(), Decimal("9.00"))
+
+    def test_recover_all_and_failed_mutations_are_not_logged(self):
+        store = self.make_store()
+        repository = CartRepository(store)
+        cart = self._fill(repository)
+        with self.assertRaises(ValueError):
+            cart.add_item("Pera", 0, "1.00")
+
+        recovered = CartRepository(self.reopen_store(store))
+        self.assertEqual(recovered.recover_all(), 2)
+        self.assertEqual(recovered.get("c2").get_total(), Decimal("10.25"))
+        self.assertNotIn("Pera", [item['name'] for item in recovered.get("c1").list_items()])
+
+    def test_transaction_rolls_back_on_error(self):
+        store = self.make_store()
+        repository = CartRepository(store)
+        with self.assertRaises(RuntimeError):
+            with repository.transaction():
+                repository.get("c1").add_item("Arroz", 1, "5.49")
+                raise RuntimeError("falha no meio do lote")
+        self.assertEqual(store.load("c1"), (None, []))
+
+    def test_rolled_back_cart_is_reloaded_before_next_mutation(self):
+        store = self.make_store()
+        repository = CartRepository(store)
+        repository.get("c1").add_item("Feijão", 1, "7.90")
+        with self.assertRaises(RuntimeError):
+            with repository.transaction():
+                repository.get("c1").add_item("Arroz", 1, "5.49")
+                raise RuntimeError("falha no meio do lote")
+        cart = repository.get("c1")
+        self.assertEqual([item['name'] for item in cart.list_items()], ["Feijão"])
+        cart.add_item("Café", 1, "10.25")
+
+        recovered = CartRepository(self.reopen_store(store)).get("c1")
+        self.assertEqual(recovered.list_items(), cart.list_items())
+        self.assertEqual(recovered.get_total(), Decimal("18.15"))
+
+    def test_rollback_restores_compacted_log(self):
+        store = self.make_store()
+        repository = CartRepository(store, snapshot_every=2)
+        repository.get("c1").add_item("Feijão", 1, "7.90")
+        with self.assertRaises(RuntimeError):
+            with repository.transaction():
+                cart = repository.get("c1")
+                cart.add_item("Arroz", 1, "5.49") # Compacta dentro da transação
+                cart.add_item("Sal", 1, "1.50")
+                repository.get("c2").add_item("Café", 1, "10.25")
+                raise RuntimeError("falha no meio do lote")
+        self.assertEqual(store.load("c1"), (None, [("add_item", ["Feijão", 1, "7.90"])]))
+        self.assertEqual(list(store.load_all()), [("c1", None, [("add_item", ["Feijão", 1, "7.90"])])])
+
+
+class TestInMemoryCartStore(CartStoreTestMixin, unittest.TestCase):
+    def make_store(self):
+        return InMemoryCartStore()
+
+
+class TestSQLiteCartStore(CartStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "carts.db")
+        self._stores = []
+
+    def tearDown(self):
+        for store in self._stores:
+            store.close()
+        self._tmp.cleanup()
+
+    def make_store(self):
+        store = SQLiteCartStore(self.path)
+        self._stores.append(store)
+        return store
+
+    def reopen_store(self, store):
+        # Uma nova conexão ao mesmo arquivo simula o processo reiniciando após uma queda
+        return self.make_store()
+
+if __name__ == '__main__':
+    unittest.main()
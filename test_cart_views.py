@@ -0,0 +1,124 @@
+# test_cart_views.py
+import random
+import sys
+import threading
+import unittest
+
+from concurrent_cart import ConcurrentCart
+from shopping_cart import Cart
+
+class TestCartViews(unittest.TestCase):
+    def setUp(self):
+        self.cart = Cart()
+        self.cart.add_item("Banana", 6, "0.50")     # 3.00
+        self.cart.add_item("Café", 2, "15.00")      # 30.00
+        self.cart.add_item("Caju", 1, "8.00")       # 8.00
+        self.cart.add_item("Arroz", 1, "30.00")     # 30.00
+
+    def _names(self, items):
+        return [item_obj.name for item_obj in items]
+
+    def test_iteration_yields_stored_items_without_copying(self):
+        view = self.cart.view()
+        self.assertEqual(len(view), 4)
+        self.assertIn("Caju", view)
+        self.assertIs(next(iter(view)), self.cart._items["Banana"])
+        self.assertIsNone(self.cart._index) # Iteração simples não cria índices
+
+    def test_top_by_total(self):
+        view = self.cart.view()
+        self.assertEqual(self._names(view.top_by_total(3)), ["Arroz", "Café", "Caju"])
+        self.cart.add_item("Banana", 100, "0.50")  # 53.00
+        self.cart.remove_item("Arroz")
+        self.assertEqual(self._names(view.top_by_total(2)), ["Banana", "Café"])
+        self.assertEqual(view.top_by_total(0), [])
+
+    def test_prefix_lookup(self):
+        view = self.cart.view()
+        self.assertEqual(self._names(view.with_prefix("Ca")), ["Café", "Caju"])
+        self.cart.add_items([("Caqui", 1, "2.00"), ("Cenoura", 1, "1.00")])
+        self.cart.remove_items(["Caju"])
+        self.assertEqual(self._names(view.with_prefix("Ca")), ["Café", "Caqui"])
+        self.assertEqual(list(view.with_prefix("Z")), [])
+
+    def test_cursor_pagination_survives_mutations(self):
+        view = self.cart.view()
+        first, cursor = view.page(2)
+        self.assertEqual(self._names(first), ["Arroz", "Banana"])
+        self.cart.add_item("Abacate", 1, "5.00") # Antes do cursor: não aparece
+        self.cart.add_item("Feijão", 1, "9.00")
+        second, cursor = view.page(2, after=cursor)
+        self.assertEqual(self._names(second), ["Café", "Caju"])
+        third, cursor = view.page(2, after=cursor)
+        self.assertEqual(self._names(third), ["Feijão"])
+        self.assertIsNone(cursor)
+        with self.assertRaises(ValueError):
+            view.page(0)
+
+    def test_index_is_reset_by_clear_and_load(self):
+        view = self.cart.view()
+        view.top_by_total(1)
+        self.cart.clear_cart()
+        self.assertEqual(view.top_by_total(5), [])
+        self.cart.add_item("Sal", 1, "2.00")
+        self.assertEqual(self._names(view.page(10)[0]), ["Sal"])
+
+        restored = Cart.load(self.cart.dump())
+        self.assertEqual(self._names(restored.view().with_prefix("S")), ["Sal"])
+
+    def test_index_matches_full_sort_after_random_mutations(self):
+        rng = random.Random(7)
+        cart = ConcurrentCart()
+        view = cart.view()
+        view.top_by_total(1)
+        for _ in range(500):
+            name = f"Item {rng.randrange(40)}"
+            if rng.random() < 0.7:
+                cart.add_item(name, rng.randint(1, 5), f"{rng.randint(1, 5000) / 100:.2f}")
+            else:
+                cart.remove_item(name, rng.choice([None, 1, 2]))
+        expected = sorted(cart._items.values(), key=lambda item_obj: (-item_obj.total_cents, item_obj.name))
+        self.assertEqual(view.top_by_total(10), expected[:10])
+        self.assertEqual(self._names(view.page(1000)[0]), sorted(cart._items))
+
+    def test_concurrent_cart_view_reads_while_writers_mutate(self):
+        cart = ConcurrentCart()
+        view = cart.view()
+        stop = threading.Event()
+        errors = []
+
+        def writer(seed):
+            rng = random.Random(seed)
+            while not stop.is_set():
+                name = f"Item {rng.randrange(40):02d}"
+                if rng.random() < 0.6:
+                    cart.add_item(name, rng.randint(1, 5), f"{rng.randint(1, 5000) / 100:.2f}")
+                else:
+                    cart.remove_item(name)
+
+        threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(2)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) # Troca de thread frequente para expor leituras no meio de uma escrita
+        for thread in threads:
+            thread.start()
+        try:
+            for _ in range(300):
+                try:
+                    top = view.top_by_total(5)
+                    totals = [item_obj.total_cents for item_obj in top]
+                    self.assertEqual(totals, sorted(totals, reverse=True))
+                    self.assertTrue(all(item_obj.name.startswith("Item 1") for item_obj in view.with_prefix("Item 1")))
+                    names = self._names(view.page(10)[0])
+                    self.assertEqual(names, sorted(names))
+                except KeyError as e:
+                    errors.append(e)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertEqual(self._names(view.page(1000)[0]), sorted(item['name'] for item in cart.list_items()))
+
+if __name__ == '__main__':
+    unittest.main()
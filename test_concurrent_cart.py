@@ -0,0 +1,131 @@
+# test_concurrent_cart.py
+import sys
+import threading
+import unittest
+from decimal import Decimal
+
+from concurrent_cart import ConcurrentCart
+from coupon_service import CouponService
+
+class TestConcurrentCart(unittest.TestCase):
+    def setUp(self):
+        self.cart = ConcurrentCart(coupon_service=CouponService())
+
+    def _run_threads(self, target, count):
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_behaves_like_cart(self):
+        self.cart.add_item("Produto", 2, "20.00")
+        self.cart.add_items([("Brinde", 1, "0.00"), ("Produto", 1, "20.00")])
+        self.assertTrue(self.cart.apply_coupon("5OFF"))
+        self.assertEqual(self.cart.get_total(), Decimal("55.00"))
+        self.cart.remove_items([("Produto", 2), "Brinde"])
+        self.assertEqual(self.cart.list_items()[0]['quantity'], 1)
+        self.assertEqual(self.cart.get_total(), Decimal("15.00"))
+        self.cart.clear_cart()
+        self.assertEqual(self.cart.get_total(), Decimal("0.00"))
+
+    def test_unhashable_names_get_cart_errors(self):
+        for lines in ([(["Produto"], 1, "1.00")], [{"name": {"x": 1}, "quantity": 1, "unit_price": "1.00"}]):
+            with self.assertRaisesRegex(ValueError, "O nome do item não pode ser vazio."):
+                self.cart.add_items(lines)
+        self.assertEqual(self.cart.list_items(), [])
+
+    def test_concurrent_add_item_does_not_lose_updates(self):
+        def worker(i):
+            for _ in range(500):
+                self.cart.add_item("Caneta", 1, "1.50")
+                self.cart.add_item(f"Item {i}", 1, "0.10")
+
+        self._run_threads(worker, 8)
+        items = {item['name']: item for item in self.cart.list_items()}
+        self.assertEqual(items['Caneta']['quantity'], 4000)
+        self.assertEqual(self.cart.get_total(), Decimal("6400.00")) # 6000.00 + 8 * 50.00
+
+    def test_changes_since_during_concurrent_writes(self):
+        version = self.cart.version
+        self._run_threads(lambda i: self.cart.add_item(f"Item {i}", 1, "1.00"), 8)
+        changes = self.cart.changes_since(version)
+        self.assertFalse(changes["full"])
+        self.assertEqual(sorted(line["name"] for line in changes["added"]), [f"Item {i}" for i in range(8)])
+        self.assertEqual(changes["total"], Decimal("8.00"))
+
+    def test_readers_always_see_consistent_snapshots(self):
+        errors = []
+        done = threading.Event()
+
+        def writer():
+            for i in range(2000):
+                self.cart.add_item("A", 1, "1.00")
+                self.cart.remove_item("A", 1)
+                self.cart.add_item(f"B{i % 10}", 1, "2.00")
+            done.set()
+
+        def reader(_):
+            while not done.is_set():
+                items, total = self.cart._snapshot # Itens e total publicados juntos
+                listed_total = sum((item_obj.total_price for item_obj in items.values()), Decimal("0.00"))
+                if listed_total != total:
+                    errors.append((listed_total, total))
+
+        readers = [threading.Thread(target=reader, args=(i,)) for i in range(3)]
+        for thread in readers:
+            thread.start()
+        writer()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_dump_during_concurrent_writes_is_consistent(self):
+        errors = []
+        done = threading.Event()
+
+        def writer():
+            for i in range(3000):
+                # A e B sempre com a mesma quantidade em cada estado publicado
+                self.cart.add_items([("A", 1, "1.00"), (f"B{i % 50}", 1, "2.00"), ("B", 1, "2.00")])
+                self.cart.remove_items([("A", 1), ("B", 1)])
+                self.cart.add_items([("A", 1, "1.00"), ("B", 1, "2.00")])
+            done.set()
+
+        def reader(_):
+            while not done.is_set():
+                try:
+                    restored = ConcurrentCart.load(self.cart.dump(), trusted=True)
+                except ValueError as e:
+                    errors.append(e)
+                    continue
+                quantities = {item['name']: item['quantity'] for item in restored.list_items()}
+                if quantities.get("A") != quantities.get("B"):
+                    errors.append(quantities)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) # Troca de thread frequente para expor leituras no meio de uma escrita
+        readers = [threading.Thread(target=reader, args=(i,)) for i in range(2)]
+        try:
+            for thread in readers:
+                thread.start()
+            writer()
+            for thread in readers:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+    def test_reads_do_not_wait_for_writers(self):
+        self.cart.add_item("Produto", 1, "10.00")
+        results = []
+        with self.cart._write_lock: # Simula um escritor segurando o lock
+            reader = threading.Thread(target=lambda: results.append((self.cart.get_total(), self.cart.list_items())))
+            reader.start()
+            reader.join(timeout=1)
+            self.assertFalse(reader.is_alive())
+        self.assertEqual(results[0][0], Decimal("10.00"))
+        self.assertEqual(len(results[0][1]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
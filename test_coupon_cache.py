@@ -0,0 +1,96 @@
+# test_coupon_cache.py
+import threading
+import unittest
+from decimal import Decimal
+
+from coupon_cache import CachedCouponService
+from coupon_service import LatencyCouponService
+from shopping_cart import Cart
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingCouponService:
+    def __init__(self):
+        self.calls = 0
+
+    def validate_coupon(self, coupon_code):
+        self.calls += 1
+        raise ConnectionError("backend indisponível")
+
+
+class TestCachedCouponService(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = LatencyCouponService(latency=0)
+        self.cache = CachedCouponService(self.backend, maxsize=2, ttl=10, negative_ttl=1, clock=self.clock)
+
+    def test_hits_are_served_without_calling_the_service(self):
+        self.assertEqual(self.cache.validate_coupon("SAVE10"), {"type": "percentage", "value": 10})
+        self.assertEqual(self.cache.validate_coupon("SAVE10"), {"type": "percentage", "value": 10})
+        self.assertEqual(self.backend.calls, 1)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "evictions": 0, "size": 1})
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.validate_coupon("SAVE10")
+        self.clock.now = 10
+        self.cache.validate_coupon("SAVE10")
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_unknown_codes_are_cached_with_negative_ttl(self):
+        self.assertIsNone(self.cache.validate_coupon("NAOEXISTE"))
+        self.assertIsNone(self.cache.validate_coupon("NAOEXISTE"))
+        self.assertEqual(self.backend.calls, 1)
+        self.clock.now = 1
+        self.assertIsNone(self.cache.validate_coupon("NAOEXISTE"))
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.validate_coupon("SAVE10")
+        self.cache.validate_coupon("5OFF")
+        self.cache.validate_coupon("SAVE10") # SAVE10 passa a ser o mais recente
+        self.cache.validate_coupon("NAOEXISTE") # Descarta 5OFF
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+        self.cache.validate_coupon("SAVE10")
+        self.assertEqual(self.backend.calls, 3)
+        self.cache.validate_coupon("5OFF")
+        self.assertEqual(self.backend.calls, 4)
+
+    def test_concurrent_misses_for_same_code_call_service_once(self):
+        backend = LatencyCouponService(latency=0.05)
+        cache = CachedCouponService(backend)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.validate_coupon("5OFF")))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(results, [{"type": "fixed", "value": 5.0}] * 8)
+
+    def test_service_errors_are_not_cached(self):
+        backend = FailingCouponService()
+        cache = CachedCouponService(backend)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                cache.validate_coupon("SAVE10")
+        self.assertEqual(backend.calls, 2)
+
+    def test_cart_does_not_mutate_cached_coupon(self):
+        cart = Cart(coupon_service=self.cache)
+        cart.add_item("Produto", 1, "100.00")
+        self.assertTrue(cart.apply_coupon("SAVE10"))
+        self.assertEqual(cart.get_total(), Decimal("90.00"))
+        self.assertIs(type(self.cache.validate_coupon("SAVE10")["value"]), int)
+        self.assertIs(type(self.backend.valid_coupons["SAVE10"]["value"]), int)
+
+if __name__ == '__main__':
+    unittest.main()
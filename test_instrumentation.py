@@ -0,0 +1,99 @@
+# test_instrumentation.py
+import logging
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from async_cart import AsyncCart
+from coupon_service import CouponService
+from instrumentation import (InMemorySink, Instrumentation, LoggingSink, PrometheusFileSink,
+                             instrument_cart, uninstrument_cart)
+from shopping_cart import Cart
+
+class FailingCouponService:
+    def validate_coupon(self, coupon_code):
+        raise ConnectionError("backend indisponível")
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.sink = InMemorySink()
+        self.metrics = Instrumentation(sink=self.sink)
+        self.cart = instrument_cart(Cart(coupon_service=CouponService()), self.metrics)
+
+    def test_counts_calls_and_latency_per_operation(self):
+        self.cart.add_item("Produto", 2, "10.00")
+        self.cart.add_item("Produto", 1, "10.00")
+        self.cart.apply_coupon("SAVE10")
+        self.assertEqual(self.cart.get_total(), Decimal("27.00"))
+        self.metrics.flush()
+
+        snapshot = self.sink.snapshots[-1]
+        self.assertEqual(snapshot["cart.add_item"]["calls"], 2)
+        self.assertEqual(snapshot["cart.apply_coupon"]["calls"], 1)
+        self.assertEqual(snapshot["coupon_service.validate_coupon"]["calls"], 1)
+        self.assertEqual(snapshot["cart.add_item"]["buckets"][-1], (float("inf"), 2))
+        self.assertGreater(snapshot["cart.add_item"]["sum"], 0)
+
+    def test_errors_are_counted_and_reraised(self):
+        with self.assertRaises(ValueError):
+            self.cart.add_item("Produto", 0, "10.00")
+        self.cart.coupon_service = FailingCouponService()
+        instrument_cart(self.cart, self.metrics, operations=())
+        with self.assertRaises(ConnectionError):
+            self.cart.apply_coupon("SAVE10")
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["cart.add_item"]["errors"], 1)
+        self.assertEqual(snapshot["cart.apply_coupon"]["errors"], 1)
+        self.assertEqual(snapshot["coupon_service.validate_coupon"]["errors"], 1)
+
+    def test_disable_and_uninstrument(self):
+        self.metrics.enabled = False
+        self.cart.add_item("Produto", 1, "10.00")
+        self.assertEqual(self.metrics.snapshot(), {})
+
+        self.metrics.enabled = True
+        uninstrument_cart(self.cart)
+        self.cart.add_item("Produto", 1, "10.00")
+        self.cart.apply_coupon("SAVE10")
+        self.assertEqual(self.metrics.snapshot(), {})
+        self.assertNotIn("add_item", vars(self.cart))
+        self.assertIsInstance(self.cart.coupon_service, CouponService)
+
+    def test_prometheus_file_sink(self):
+        self.cart.add_item("Produto", 1, "10.00")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cart.prom")
+            self.metrics.sink = PrometheusFileSink(path)
+            self.metrics.flush()
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+            self.assertEqual(os.listdir(directory), ["cart.prom"])
+
+        self.assertIn("# TYPE cart_operation_seconds histogram", content)
+        self.assertIn('cart_operation_seconds_bucket{operation="cart.add_item",le="+Inf"} 1', content)
+        self.assertIn('cart_operation_seconds_count{operation="cart.add_item"} 1', content)
+        self.assertIn('cart_operation_errors_total{operation="cart.add_item"} 0', content)
+
+    def test_logging_sink(self):
+        self.cart.add_item("Produto", 1, "10.00")
+        self.metrics.sink = LoggingSink(logging.getLogger("test.cart"))
+        with self.assertLogs("test.cart", level="INFO") as logs:
+            self.metrics.flush()
+        self.assertIn("cart.add_item calls=1 errors=0", logs.output[0])
+
+
+class TestAsyncInstrumentation(unittest.IsolatedAsyncioTestCase):
+    async def test_coroutine_methods_are_timed(self):
+        metrics = Instrumentation()
+        cart = instrument_cart(AsyncCart(coupon_service=CouponService()), metrics)
+        cart.add_item("Produto", 1, "100.00")
+        self.assertTrue(await cart.apply_coupon("SAVE10"))
+        self.assertEqual(cart.get_total(), Decimal("90.00"))
+        self.assertEqual(metrics.snapshot()["cart.apply_coupon"]["calls"], 1)
+        self.assertEqual(metrics.snapshot()["coupon_service.validate_coupon"]["calls"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
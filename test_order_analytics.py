@@ -0,0 +1,97 @@
+# test_order_analytics.py
+import collections
+import csv
+import io
+import json
+import random
+import unittest
+from decimal import Decimal
+
+from coupon_service import CouponService
+from order_analytics import analyze_csv, analyze_json_lines, cart_records
+from shopping_cart import Cart
+
+FIELDS = ["cart_id", "name", "quantity", "unit_price", "coupon_type", "coupon_value"]
+
+
+class TestOrderAnalytics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(99)
+        service = CouponService()
+        cls.carts = []
+        for _ in range(120):
+            cart = Cart(coupon_service=service)
+            for _ in range(rng.randint(1, 9)):
+                cart.add_item(f"Item {rng.randrange(15)}", rng.randint(1, 4),
+                              f"{rng.randint(1, 99999) / 10 ** rng.choice((2, 3)):.3f}")
+            cart.apply_coupon(rng.choice(["SAVE10", "5OFF", "NAOEXISTE"]))
+            cls.carts.append(cart)
+        cls.records = [record for i, cart in enumerate(cls.carts) for record in cart_records(i, cart)]
+
+    def _jsonl(self):
+        return io.StringIO("".join(json.dumps(record) + "\n" for record in self.records))
+
+    def _csv(self):
+        stream = io.StringIO()
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        writer.writerows(self.records)
+        stream.seek(0)
+        return stream
+
+    def _assert_matches_carts(self, analytics):
+        self.assertEqual(analytics.carts, len(self.carts))
+        self.assertEqual(analytics.lines, len(self.records))
+        self.assertEqual(Decimal(analytics.total_cents).scaleb(-2), sum(cart.get_total() for cart in self.carts))
+        self.assertEqual(analytics.subtotal_cents, sum(cart._subtotal_cents for cart in self.carts))
+
+        revenue, sizes = collections.Counter(), collections.Counter()
+        for cart in self.carts:
+            for item_obj in cart._items.values():
+                revenue[item_obj.name] += item_obj.total_cents
+            sizes[sum(item_obj.quantity for item_obj in cart._items.values())] += 1
+        self.assertEqual(analytics.revenue_by_item, revenue)
+        self.assertEqual(analytics.basket_sizes, sizes)
+
+        uplift = analytics.coupon_uplift()
+        with_coupon = sum(1 for cart in self.carts if cart._applied_coupon)
+        self.assertEqual(uplift["carts_with_coupon"], with_coupon)
+        self.assertEqual(uplift["carts_without_coupon"], len(self.carts) - with_coupon)
+
+    def test_json_lines_in_small_chunks(self):
+        # Blocos menores que um carrinho forçam carrinhos divididos entre blocos
+        for chunk_size in (1, 7, 10_000):
+            with self.subTest(chunk_size=chunk_size):
+                self._assert_matches_carts(analyze_json_lines(self._jsonl(), chunk_size=chunk_size))
+
+    def test_csv_matches_json_lines(self):
+        self._assert_matches_carts(analyze_csv(self._csv(), chunk_size=13, use_numpy=False))
+
+    def test_process_pool(self):
+        self._assert_matches_carts(analyze_json_lines(self._jsonl(), chunk_size=50, processes=2))
+
+    def test_top_items_and_duplicate_lines(self):
+        stream = io.StringIO(
+            '{"cart_id": 1, "name": "Café", "quantity": 1, "unit_price": 10.005}\n'
+            '{"cart_id": 1, "name": "Café", "quantity": 1, "unit_price": 10.005}\n'
+            '\n'
+            '{"cart_id": 2, "name": "Pão", "quantity": 3, "unit_price": "0.50", "coupon_type": "fixed", "coupon_value": "-1"}\n'
+        )
+        analytics = analyze_json_lines(stream, chunk_size=1)
+        # Linhas repetidas são mescladas como em add_items: 2 x 10.005 = 20.01
+        self.assertEqual(analytics.top_items(2), [("Café", Decimal("20.01")), ("Pão", Decimal("1.50"))])
+        self.assertEqual(analytics.coupon_uplift()["carts_with_coupon"], 0) # Valor negativo é rejeitado
+        self.assertEqual(analytics.basket_sizes, {2: 1, 3: 1})
+
+    def test_invalid_record_reports_position(self):
+        stream = io.StringIO('{"cart_id": 1, "name": "Café", "quantity": 0, "unit_price": "1.00"}\n')
+        with self.assertRaisesRegex(ValueError, "Registro 1 .*quantidade"):
+            analyze_json_lines(stream)
+
+    def test_empty_input(self):
+        self.assertEqual(analyze_csv(io.StringIO("")).carts, 0)
+        self.assertIsNone(analyze_json_lines(io.StringIO("")).coupon_uplift()["uplift"])
+
+if __name__ == '__main__':
+    unittest.main()
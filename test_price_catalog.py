@@ -0,0 +1,125 @@
+# test_price_catalog.py
+import multiprocessing
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from cart_service import ShardedCartService
+from price_catalog import PriceTable, write_price_table
+from shopping_cart import Cart
+
+def _read_price(path, sku, queue):
+    with PriceTable(path) as table:
+        queue.put(table.price_cents(sku))
+
+
+class TestPriceCatalog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "prices.bin")
+        write_price_table(self.path, [1000, None, 250])
+        self.table = PriceTable(self.path, refresh_interval=0)
+
+    def tearDown(self):
+        self.table.close()
+        self.directory.cleanup()
+
+    def test_lookup_by_sku(self):
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual(self.table.generation, 1)
+        self.assertEqual(self.table.price_cents(0), 1000)
+        self.assertEqual(self.table.get(2), 250)
+        for sku in (1, 3, -1, True, "0"):
+            with self.assertRaises(KeyError):
+                self.table.price_cents(sku)
+
+    def test_cart_resolves_prices_from_catalog(self):
+        cart = Cart(price_table=self.table)
+        cart.add_sku(0, 2)
+        cart.add_sku(2, 3, name="Pão")
+        self.assertEqual(cart.get_total(), Decimal("27.50"))
+        self.assertEqual(cart.list_items()[0]["name"], "SKU 0")
+        with self.assertRaisesRegex(ValueError, "SKU sem preço"):
+            cart.add_sku(1, 1)
+        with self.assertRaisesRegex(ValueError, "tabela de preços"):
+            Cart().add_sku(0, 1)
+
+    def test_hot_swap_is_picked_up_at_next_total(self):
+        cart = Cart(price_table=self.table)
+        cart.add_sku(0, 2)
+        cart.add_item("Avulso", 1, "1.00")
+        self.assertEqual(cart.get_total(), Decimal("21.00"))
+
+        self.assertEqual(write_price_table(self.path, {0: 1250, 2: 300}), 2)
+        self.assertEqual(os.listdir(self.directory.name), ["prices.bin"])
+        self.assertEqual(cart.get_total(), Decimal("26.00"))
+        self.assertEqual(self.table.generation, 2)
+
+        write_price_table(self.path, {2: 300}) # SKU 0 saiu: mantém o último preço
+        self.assertEqual(cart.get_total(), Decimal("26.00"))
+        cart.remove_item("SKU 0")
+        self.assertEqual(cart.get_total(), Decimal("1.00"))
+        self.assertEqual(cart._catalog_skus, {})
+
+    def test_refresh_checks_the_file_at_most_once_per_interval(self):
+        with PriceTable(self.path, refresh_interval=3600) as table:
+            cart = Cart(price_table=table)
+            cart.add_sku(0, 1)
+            write_price_table(self.path, {0: 1250})
+            self.assertEqual(cart.get_total(), Decimal("10.00")) # Ainda dentro do intervalo
+            self.assertEqual(table.refresh(force=True), 2)
+            self.assertEqual(cart.get_total(), Decimal("12.50"))
+
+    def test_manual_price_replaces_catalog_price(self):
+        cart = Cart(price_table=self.table)
+        cart.add_sku(0, 1, name="Café")
+        cart.add_sku(2, 1, name="Pão")
+        cart.add_item("Café", 1, "4.00")
+        cart.add_items([("Pão", 1, "3.00")])
+        write_price_table(self.path, {0: 1250, 2: 300})
+        self.assertEqual(cart.get_total(), Decimal("14.00")) # 2 * 4.00 + 2 * 3.00
+        self.assertEqual(cart._catalog_skus, {})
+        cart.add_sku(0, 1, name="Café") # Volta a seguir o catálogo
+        self.assertEqual(cart.get_total(), Decimal("43.50")) # 3 * 12.50 + 2 * 3.00
+
+    def test_close_releases_the_mapping(self):
+        with PriceTable(self.path) as table:
+            self.assertEqual(table.price_cents(2), 250)
+        self.assertEqual(len(table), 0)
+        self.assertIsNone(table.get(2))
+        with self.assertRaisesRegex(ValueError, "fechada"):
+            table.refresh()
+        table.close() # Fechar de novo não tem efeito
+
+    def test_invalid_tables_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "Preço inválido"):
+            write_price_table(self.path, [100, -5])
+        with self.assertRaisesRegex(ValueError, "SKU inválido"):
+            write_price_table(self.path, {"abc": 100})
+        with PriceTable(self.path) as table:
+            self.assertEqual(table.price_cents(0), 1000) # Tabela publicada intacta
+        with open(self.path, "wb") as f:
+            f.write(b"not a table at all, definitely")
+        with self.assertRaisesRegex(ValueError, "tabela de preços"):
+            PriceTable(self.path)
+
+    def test_table_is_readable_from_other_processes(self):
+        context = multiprocessing.get_context()
+        queue = context.Queue()
+        process = context.Process(target=_read_price, args=(self.path, 2, queue))
+        process.start()
+        self.assertEqual(queue.get(timeout=10), 250)
+        process.join()
+
+    def test_sharded_workers_share_the_table(self):
+        with ShardedCartService(workers=2, price_table_path=self.path,
+                                price_refresh_interval=0) as service:
+            service.add_sku("a", 0, 1)
+            service.add_sku("b", 2, 4)
+            write_price_table(self.path, [2000, None, 250])
+            self.assertEqual(service.get_total("a"), Decimal("20.00"))
+            self.assertEqual(service.get_total("b"), Decimal("10.00"))
+
+if __name__ == '__main__':
+    unittest.main()
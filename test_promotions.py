@@ -0,0 +1,90 @@
+# test_promotions.py
+import unittest
+from decimal import Decimal
+
+from coupon_service import CouponService
+from promotions import BuyXGetY, ItemPercentOff, PromotionEngine, SpendThreshold
+from shopping_cart import Cart
+
+class TestPromotionEngine(unittest.TestCase):
+    def _cart(self, rules, coupon_service=None):
+        return Cart(coupon_service=coupon_service, promotion_engine=PromotionEngine(rules))
+
+    def test_cart_without_engine_is_unchanged(self):
+        cart = Cart()
+        cart.add_item("Café", 2, "10.00")
+        self.assertEqual(cart.get_total(), Decimal("20.00"))
+
+    def test_item_percent_off(self):
+        cart = self._cart([ItemPercentOff("Café", "12.5")])
+        cart.add_item("Café", 3, "10.99") # 32.97 - 4.12125 -> 4.12
+        cart.add_item("Pão", 1, "1.00")
+        self.assertEqual(cart.get_total(), Decimal("29.85"))
+
+    def test_buy_x_get_y(self):
+        cart = self._cart([BuyXGetY("Suco", buy=2, get=1)])
+        cart.add_item("Suco", 7, "4.00") # 2 grupos de 3 -> 2 grátis
+        self.assertEqual(cart.get_total(), Decimal("20.00"))
+
+    def test_spend_thresholds_use_only_reached_tiers(self):
+        rules = [
+            SpendThreshold("100.00", amount="5.00", stackable=False),
+            SpendThreshold("200.00", amount="15.00", stackable=False),
+            SpendThreshold("500.00", percent="10", stackable=False),
+            SpendThreshold("150.00", amount="1.00"), # Empilha com o melhor tier
+        ]
+        cart = self._cart(rules)
+        cart.add_item("Produto", 1, "99.99")
+        self.assertEqual(cart.get_total(), Decimal("99.99"))
+        cart.add_item("Produto", 1, "99.99") # 199.98
+        self.assertEqual(cart.get_total(), Decimal("193.98"))
+        cart.add_item("Produto", 1, "99.99") # 299.97
+        self.assertEqual(cart.get_total(), Decimal("283.97"))
+
+    def test_thresholds_apply_after_item_discounts(self):
+        cart = self._cart([ItemPercentOff("TV", 50), SpendThreshold("1000.00", amount="100.00")])
+        cart.add_item("TV", 1, "1500.00") # 750.00 após o item, não atinge 1000
+        self.assertEqual(cart.get_total(), Decimal("750.00"))
+
+    def test_non_stackable_item_rules_pick_best(self):
+        cart = self._cart([
+            ItemPercentOff("Vinho", 10, stackable=False),
+            BuyXGetY("Vinho", buy=1, get=1, stackable=False),
+            ItemPercentOff("Vinho", 5),
+        ])
+        cart.add_item("Vinho", 2, "50.00") # Melhor exclusivo: 50.00; empilhável: 5.00
+        self.assertEqual(cart.get_total(), Decimal("45.00"))
+
+    def test_promotion_codes_stack_with_coupon(self):
+        rules = [ItemPercentOff("Café", 20, code="CAFE20"), SpendThreshold("10.00", amount="2.00", code="FRETE")]
+        cart = self._cart(rules, coupon_service=CouponService())
+        cart.add_item("Café", 5, "10.00")
+        self.assertEqual(cart.get_total(), Decimal("50.00"))
+
+        self.assertTrue(cart.apply_coupon("CAFE20"))
+        self.assertTrue(cart.apply_coupon("FRETE"))
+        self.assertEqual(cart.get_total(), Decimal("38.00"))
+        self.assertTrue(cart.apply_coupon("SAVE10")) # 10% sobre 38.00
+        self.assertEqual(cart.get_total(), Decimal("34.20"))
+        self.assertFalse(cart.apply_coupon("NAOEXISTE"))
+        self.assertEqual(cart.get_total(), Decimal("38.00"))
+
+        cart.clear_cart()
+        cart.add_item("Café", 1, "10.00")
+        self.assertEqual(cart.get_total(), Decimal("10.00"))
+
+    def test_discount_never_exceeds_subtotal(self):
+        cart = self._cart([SpendThreshold("1.00", amount="50.00")])
+        cart.add_item("Chiclete", 2, "0.50")
+        self.assertEqual(cart.get_total(), Decimal("0.00"))
+
+    def test_invalid_rules_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "não pode passar de 100"):
+            ItemPercentOff("Café", 101)
+        with self.assertRaisesRegex(ValueError, "inteiros positivos"):
+            BuyXGetY("Café", buy=0, get=1)
+        with self.assertRaisesRegex(ValueError, "amount ou percent"):
+            SpendThreshold("10.00")
+
+if __name__ == '__main__':
+    unittest.main()
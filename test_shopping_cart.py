@@ -1,10 +1,11 @@
 # test_shopping_cart.py
+import io
 import unittest
 from decimal import Decimal, ROUND_HALF_UP # ROUND_HALF_UP não é usado diretamente nos testes, mas Decimal é.
 from shopping_cart import Cart
 from coupon_service import CouponService # Usaremos a implementação real (mock) para "integração"
-# A classe Item não precisa ser importada diretamente nos testes,
-# pois interagimos com ela através da interface da classe Cart.
+from cart_import import read_csv_lines, read_json_lines
+from item import Item, _price_to_units # Usados apenas nos testes da representação interna do item
 
 class TestShoppingCartUnit(unittest.TestCase):
     def setUp(self):
@@ -252,5 +253,266 @@ class TestShoppingCartIntegration(unittest.TestCase):
         self.assertIsNone(cart_no_service._applied_coupon)
         self.assertEqual(cart_no_service.get_total(), Decimal("10.00")) # Total não muda
 
+class TestShoppingCartRunningSubtotal(unittest.TestCase):
+    """O subtotal incremental deve ser idêntico à soma linha a linha."""
+
+    def setUp(self):
+        self.cart = Cart(coupon_service=CouponService())
+
+    def _rescan_subtotal(self):
+        total = Decimal("0.00")
+        for item_obj in self.cart._items.values():
+            total += item_obj.total_price
+        return total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    def test_running_subtotal_matches_rescan_after_mutations(self):
+        self.cart.add_item("Caneta", 3, "0.335")   # 1.005 -> 1.01 por linha
+        self.cart.add_item("Lápis", 7, "0.125")    # 0.875 -> 0.88
+        self.cart.add_item("Caneta", 2, "0.333")   # 5 * 0.333 = 1.665 -> 1.67
+        self.assertEqual(self.cart._calculate_subtotal(), self._rescan_subtotal())
+
+        self.cart.remove_item("Lápis", 3)          # 4 * 0.125 = 0.50
+        self.assertEqual(self.cart._calculate_subtotal(), self._rescan_subtotal())
+        self.assertEqual(self.cart.get_total(), Decimal("2.17"))
+
+        self.cart.remove_item("Caneta")
+        self.assertEqual(self.cart._calculate_subtotal(), self._rescan_subtotal())
+        self.assertEqual(self.cart.get_total(), Decimal("0.50"))
+
+    def test_cached_total_follows_item_and_coupon_changes(self):
+        self.cart.add_item("Produto", 1, "100.00")
+        self.assertEqual(self.cart.get_total(), Decimal("100.00"))
+        self.cart.apply_coupon("SAVE10")
+        self.assertEqual(self.cart.get_total(), Decimal("90.00"))
+        self.cart.add_item("Produto", 1, "100.00")
+        self.assertEqual(self.cart.get_total(), Decimal("180.00"))
+        self.cart.clear_cart()
+        self.assertEqual(self.cart.get_total(), Decimal("0.00"))
+
+
+class TestItemCompactRepresentation(unittest.TestCase):
+    def test_item_has_no_instance_dict(self):
+        item = Item("Caderno", 1, "12.90")
+        self.assertFalse(hasattr(item, "__dict__"))
+
+    def test_unit_price_preserves_decimal_places(self):
+        self.assertEqual(str(Item("Borracha", 1, "0.5").unit_price), "0.5")
+        self.assertEqual(str(Item("Borracha", 1, "0.50").unit_price), "0.50")
+        self.assertEqual(str(Item("Borracha", 1, 2).unit_price), "2")
+
+    def test_total_price_rounds_half_up_per_line(self):
+        item = Item("Clipe", 3, "0.335") # 1.005
+        self.assertEqual(item.total_price, Decimal("1.01"))
+        self.assertEqual(item.total_cents, 101)
+        item.unit_price = "0.3349" # 1.0047
+        self.assertEqual(item.total_price, Decimal("1.00"))
+
+    def test_prices_beyond_decimal_context_stay_exact(self):
+        price = "1234567890123456789012345678.99" # 30 dígitos, acima dos 28 do contexto
+        item = Item("Lote", 1, price)
+        self.assertEqual(item.unit_price, Decimal(price))
+        self.assertEqual(item.total_price, Decimal(price))
+        long_price = "9" * 35 + ".123" # Fora do caminho rápido
+        self.assertEqual(Item("Lote", 1, long_price).unit_price, Decimal(long_price))
+        self.assertEqual(Item("Lote", 1, Decimal(long_price)).unit_price, Decimal(long_price))
+        cart = Cart()
+        cart.add_item("Lote", 2, price)
+        self.assertEqual(cart.get_total(), Decimal("2469135780246913578024691357.98"))
+
+    def test_invalid_prices_keep_error_messages(self):
+        with self.assertRaisesRegex(ValueError, "Preço unitário inválido: O preço unitário não pode ser negativo."):
+            Item("Régua", 1, "-0.01")
+        item = Item("Régua", 1, "1.00")
+        with self.assertRaisesRegex(ValueError, "Preço unitário inválido ao atualizar"):
+            item.unit_price = "abc"
+        self.assertEqual(item.unit_price, Decimal("1.00")) # Preço anterior preservado
+
+    def test_fast_price_parsing_matches_decimal(self):
+        samples = ["0", "7", "007.50", "0.00", "19.99", "0.335", "1.", ".5", " 2.5 ", "+3.10", "1e2",
+                   "1_000", "12" * 20, "٣.5", "²", "1.2.3", "", "-0", "-1.5", "NaN", "Infinity",
+                   0, 42, 10.5, 0.1, Decimal("3.140"), Decimal("1E+2")]
+        for value in samples:
+            with self.subTest(value=value):
+                try:
+                    expected = Decimal(str(value))
+                    expected = None if not expected.is_finite() or expected < 0 else expected
+                except Exception:
+                    expected = None
+                if expected is None:
+                    with self.assertRaises(Exception):
+                        _price_to_units(value)
+                    continue
+                units, scale = _price_to_units(value)
+                self.assertEqual(Decimal(f"{units}e-{scale}"), expected)
+                self.assertEqual(scale, max(-expected.as_tuple().exponent, 0))
+
+    def test_cart_error_messages_for_unusual_prices(self):
+        cart = Cart()
+        for price in (True, "1.2.3", "NaN", "²", None):
+            with self.subTest(price=price):
+                with self.assertRaisesRegex(ValueError, "Preço unitário inválido fornecido ao carrinho."):
+                    cart.add_item("Lápis", 1, price)
+        with self.assertRaisesRegex(ValueError, "O preço unitário não pode ser negativo."):
+            cart.add_item("Lápis", 1, -1)
+        self.assertEqual(cart.list_items(), [])
+
+
+class TestShoppingCartBulkOperations(unittest.TestCase):
+    def setUp(self):
+        self.cart = Cart()
+
+    def test_add_items_matches_sequential_add_item(self):
+        lines = [("Arroz", 2, "5.49"), {"name": "Feijão", "quantity": 1, "unit_price": "7.90"},
+                 ("Arroz", 1, "5.29"), ("Sal", 3, 1.5)]
+        sequential = Cart()
+        for name, quantity, unit_price in [("Arroz", 2, "5.49"), ("Feijão", 1, "7.90"),
+                                           ("Arroz", 1, "5.29"), ("Sal", 3, 1.5)]:
+            sequential.add_item(name, quantity, unit_price)
+
+        self.cart.add_items(lines)
+        self.assertEqual(self.cart.list_items(), sequential.list_items())
+        self.assertEqual(self.cart.get_total(), sequential.get_total())
+
+    def test_add_items_keeps_scale_of_equal_decimal_prices(self):
+        self.cart.add_items([("A", 1, Decimal("1.0")), ("B", 1, Decimal("1.00")), ("C", 1, 1), ("D", 1, "1.0")])
+        prices = {item['name']: str(item['unit_price']) for item in self.cart.list_items()}
+        self.assertEqual(prices, {"A": "1.0", "B": "1.00", "C": "1", "D": "1.0"})
+
+    def test_add_items_is_atomic(self):
+        self.cart.add_item("Arroz", 1, "5.49")
+        with self.assertRaisesRegex(ValueError, "A quantidade para adicionar deve ser um inteiro positivo."):
+            self.cart.add_items([("Arroz", 2, "5.49"), ("Feijão", 0, "7.90")])
+        with self.assertRaisesRegex(ValueError, "Preço unitário inválido fornecido ao carrinho."):
+            self.cart.add_items([("Feijão", 1, "7.90"), ("Sal", 1, "abc")])
+
+        self.assertEqual(len(self.cart.list_items()), 1)
+        self.assertEqual(self.cart.list_items()[0]['quantity'], 1)
+        self.assertEqual(self.cart.get_total(), Decimal("5.49"))
+
+    def test_add_items_from_csv_and_json_lines(self):
+        csv_stream = io.StringIO("name,quantity,unit_price\nLeite,2,4.50\nPão,1,0.75\n")
+        json_stream = io.StringIO('{"name": "Leite", "quantity": 1, "unit_price": 4.40}\n\n["Café", 1, "10.25"]\n')
+
+        self.cart.add_items(read_csv_lines(csv_stream))
+        self.cart.add_items(read_json_lines(json_stream))
+
+        items = {item['name']: item for item in self.cart.list_items()}
+        self.assertEqual(items['Leite']['quantity'], 3)
+        self.assertEqual(items['Leite']['unit_price'], Decimal("4.40"))
+        self.assertEqual(self.cart.get_total(), Decimal("24.20")) # 13.20 + 0.75 + 10.25
+
+    def test_remove_items_merges_quantities(self):
+        self.cart.add_items([("Ovo", 12, "0.80"), ("Queijo", 1, "25.00"), ("Presunto", 1, "18.00")])
+        self.cart.remove_items([("Ovo", 4), ("Ovo", 3), "Queijo", {"name": "Inexistente"}])
+
+        items = {item['name']: item for item in self.cart.list_items()}
+        self.assertEqual(sorted(items), ["Ovo", "Presunto"])
+        self.assertEqual(items['Ovo']['quantity'], 5)
+        self.assertEqual(self.cart.get_total(), Decimal("22.00"))
+
+        with self.assertRaisesRegex(ValueError, "A quantidade a ser removida deve ser positiva."):
+            self.cart.remove_items(["Presunto", ("Ovo", 0)])
+        self.assertEqual(len(self.cart.list_items()), 2) # Nada foi removido
+        for quantity in (1.5, "1"):
+            with self.assertRaisesRegex(ValueError, "A quantidade a ser removida deve ser um inteiro positivo."):
+                self.cart.remove_items([("Presunto", 1), ("Ovo", quantity)])
+        self.assertEqual(len(self.cart.list_items()), 2)
+
+
+class TestShoppingCartDeltaSync(unittest.TestCase):
+    def setUp(self):
+        self.cart = Cart(coupon_service=CouponService())
+        self.cart.add_item("Arroz", 1, "20.00")
+        self.cart.add_item("Feijão", 2, "8.00")
+        self.synced = self.cart.version
+
+    def _names(self, lines):
+        return [line["name"] for line in lines]
+
+    def test_version_grows_on_every_change(self):
+        version = self.cart.version
+        self.cart.apply_coupon("SAVE10")
+        self.assertGreater(self.cart.version, version)
+        version = self.cart.version
+        self.cart.remove_item("Inexistente")
+        self.assertEqual(self.cart.version, version)
+
+    def test_changes_since_returns_only_changed_lines(self):
+        self.cart.add_item("Café", 1, "15.00")
+        self.cart.add_item("Arroz", 1, "21.00")
+        self.cart.remove_item("Feijão")
+        self.cart.add_items([("Sal", 1, "2.00"), ("Café", 1, "15.00")])
+        self.cart.add_item("Tmp", 1, "1.00")
+        self.cart.remove_items(["Tmp"]) # Adicionado e removido: não aparece
+
+        changes = self.cart.changes_since(self.synced)
+        self.assertFalse(changes["full"])
+        self.assertEqual(self._names(changes["added"]), ["Café", "Sal"])
+        self.assertEqual(changes["added"][0]["quantity"], 2)
+        self.assertEqual(self._names(changes["modified"]), ["Arroz"])
+        self.assertEqual(changes["removed"], ["Feijão"])
+        self.assertEqual(changes["total"], Decimal("74.00"))
+        self.assertEqual(changes["version"], self.cart.version)
+
+        unchanged = self.cart.changes_since(changes["version"])
+        self.assertEqual((unchanged["added"], unchanged["modified"], unchanged["removed"]), ([], [], []))
+
+    def test_coupon_change_reports_new_total_without_lines(self):
+        self.cart.apply_coupon("SAVE10")
+        changes = self.cart.changes_since(self.synced)
+        self.assertEqual((changes["added"], changes["modified"], changes["removed"]), ([], [], []))
+        self.assertEqual(changes["total"], Decimal("32.40"))
+
+    def test_stale_or_unknown_versions_get_full_snapshot(self):
+        self.cart.DELTA_LOG_SIZE = 4
+        for i in range(10):
+            self.cart.add_item(f"Item {i}", 1, "1.00")
+        stale = self.cart.changes_since(self.synced)
+        self.assertTrue(stale["full"])
+        self.assertEqual(stale["added"], self.cart.list_items())
+        self.assertFalse(self.cart.changes_since(self.cart.version - 3)["full"])
+        self.assertTrue(self.cart.changes_since(self.cart.version + 1)["full"])
+        self.assertTrue(self.cart.changes_since(None)["full"])
+
+        version = self.cart.version
+        self.cart.clear_cart()
+        cleared = self.cart.changes_since(version)
+        self.assertTrue(cleared["full"])
+        self.assertEqual(cleared["added"], [])
+
+    def test_versions_from_before_a_reload_get_full_snapshot(self):
+        for i in range(5):
+            self.cart.add_item(f"Item {i}", 1, "1.00")
+        for trusted in (True, False):
+            with self.subTest(trusted=trusted):
+                reloaded = Cart.load(self.cart.dump(), trusted=trusted)
+                changes = reloaded.changes_since(self.synced)
+                self.assertTrue(changes["full"])
+                self.assertEqual(changes["added"], reloaded.list_items())
+                self.assertTrue(reloaded.changes_since(self.cart.version)["full"])
+        self.assertFalse(self.cart.changes_since(self.synced)["full"]) # O original segue com deltas
+
+    def test_replaying_deltas_rebuilds_the_cart(self):
+        client, version = {}, 0
+        operations = [
+            lambda: self.cart.add_item("Leite", 6, "4.50"),
+            lambda: self.cart.remove_item("Arroz", 1),
+            lambda: self.cart.add_items([("Leite", 1, "4.40"), ("Ovo", 12, "0.80")]),
+            lambda: self.cart.remove_items([("Ovo", 2)]),
+        ]
+        for operation in [lambda: None] + operations:
+            operation()
+            changes = self.cart.changes_since(version)
+            if changes["full"]:
+                client = {}
+            for line in changes["added"] + changes["modified"]:
+                client[line["name"]] = line
+            for name in changes["removed"]:
+                del client[name]
+            version = changes["version"]
+            self.assertEqual(sorted(client.values(), key=lambda line: line["name"]),
+                             sorted(self.cart.list_items(), key=lambda line: line["name"]))
+
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False) # exit=False é útil para rodar em alguns ambientes como Jupyter
\ No newline at end of file